@@ -0,0 +1,208 @@
+"""
+Multi-stream ASR server: one loaded model serves many concurrent PCM streams
+(the Electron app, the game, recorded-file jobs, ...).
+
+Protocol (TCP, little endian, same framing style as ocr_server.py):
+    client -> server: header <III (stream_id, kind, payload_size) followed by the payload
+        kind 0: int16 mono PCM at 16kHz
+        kind 1: end of stream, the last utterance is flushed and the stream is closed
+    server -> client: <I payload length followed by a UTF-8 JSON object
+        {'stream': id, 'utterance': n, 'committed': delta, 'tentative': text}
+        {'stream': id, 'closed': True}
+        {'stream': id, 'error': message}  a decode of the stream failed, streaming goes on
+
+Every stream keeps its own RollingBuffer, VAD and commit state (silero keeps its recurrent state
+in the model object, so each stream loads its own copy, off the event loop). Inference requests of all
+streams that have new audio are batched into a single backend.transcribe_batch call per tick.
+"""
+
+import json
+import struct
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+from silero_vad import load_silero_vad
+
+from super_asr import (RollingBuffer, StreamingASR, StreamingVAD, dispatch_vad_events,
+                       ASR_BACKEND, SAMPLE_RATE, CONTEXT_SECONDS, STEP_SECONDS)
+from utils.asr_backends import get_backend
+
+PCM = 0
+END = 1
+HEADER = struct.Struct("<III")
+BATCH_WINDOW = 0.02 # seconds to wait for other streams to join a batch
+
+
+class ASRStream(StreamingASR):
+    """
+    A StreamingASR whose decodes are run by ASRServer instead of its own worker:
+    request_infer() only marks the stream dirty and the server decodes it in the next batch.
+    """
+    def __init__(self, stream_id, backend, send, wake: asyncio.Event, vad_model):
+        super().__init__(backend=backend,
+                         buffer=RollingBuffer(CONTEXT_SECONDS, SAMPLE_RATE),
+                         step_seconds=STEP_SECONDS,
+                         emit_callback=self._on_emit)
+        self.stream_id = stream_id
+        self._vad_model = vad_model
+        self.vad = StreamingVAD(vad_model, sample_rate=self.sample_rate)
+        self.dirty = False
+        self.closing = False
+        self.disconnected = False # set when the client connection closes, pending results are dropped
+        self._send = send
+        self._wake = wake
+
+    def _on_emit(self, asr, committed, tentative):
+        self._send({'stream': self.stream_id,
+                    'utterance': len(self.text_outputs),
+                    'committed': committed,
+                    'tentative': tentative})
+
+    def request_infer(self):
+        self.requested_steps += 1
+        if self.dirty:
+            self.skipped_steps += 1 # the pending snapshot is replaced by a newer one
+        self.dirty = True
+        self._wake.set()
+
+    def collect_jobs(self) -> list:
+        """Decode jobs for the next batch: finals of ended utterances first, then the current window."""
+        jobs = []
+        while self._finals:
+            samples = self._finals.popleft()
+            if samples is None:
+                self._apply_final(None) # nothing left to decode
+            else:
+                jobs.append(('final', self, samples, None))
+        if self.dirty and len(self.buffer):
+            # get_float32 writes into the buffer's own float array, capture only touches the int16 storage
+            samples = self.buffer.get_float32()
+            jobs.append(('window', self, samples, (self.buffer.start_sample, len(samples), self._epoch)))
+        self.dirty = False
+        return jobs
+
+    def apply(self, kind, res, state):
+        self.completed_steps += 1
+        if kind == 'final':
+            self._apply_final(res)
+            return
+        window_start, window_samples, epoch = state
+        if epoch == self._epoch:
+            self._handle_hypothesis(res, window_start, window_samples)
+
+    def fail(self, kind, error):
+        """A job of this stream was in a failed batch: tell the client, an ended utterance keeps its tentative text."""
+        self.completed_steps += 1
+        self._send({'stream': self.stream_id, 'error': error})
+        if kind == 'final':
+            self._apply_final(None)
+
+
+class ASRServer:
+    def __init__(self, backend):
+        self.backend = backend
+        self.streams = {} # (connection id, stream id) -> ASRStream
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="asr-batch")
+        self._wake = asyncio.Event()
+        self._next_conn = 0
+
+        # counters
+        self.batches = 0
+        self.batched_jobs = 0
+        self.failed_batches = 0
+
+    def stats(self) -> dict:
+        return {'streams': len(self.streams),
+                'batches': self.batches,
+                'failed_batches': self.failed_batches,
+                'mean_batch_size': self.batched_jobs / self.batches if self.batches else 0.0}
+
+    async def run_batches(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._wake.wait()
+            await asyncio.sleep(BATCH_WINDOW)
+            self._wake.clear()
+
+            jobs = []
+            for stream in list(self.streams.values()):
+                jobs.extend(stream.collect_jobs())
+            if jobs:
+                try:
+                    results = await loop.run_in_executor(self._executor, self.backend.transcribe_batch,
+                                                         [samples for _, _, samples, _ in jobs])
+                except Exception as e:
+                    # bad audio, out of memory, ...: fail this batch's jobs, keep serving every stream
+                    print(f"ASR batch of {len(jobs)} failed: {e!r}")
+                    self.failed_batches += 1
+                    for kind, stream, _, _ in jobs:
+                        if not stream.disconnected:
+                            stream.fail(kind, repr(e))
+                    continue
+                self.batches += 1
+                self.batched_jobs += len(jobs)
+                for (kind, stream, _, state), res in zip(jobs, results):
+                    if not stream.disconnected:
+                        stream.apply(kind, res, state)
+
+            # streams that ended and have nothing left to decode are closed
+            for key, stream in list(self.streams.items()):
+                if stream.closing and not stream._finals and not stream.dirty:
+                    stream._send({'stream': stream.stream_id, 'closed': True})
+                    del self.streams[key]
+
+    async def handle_client(self, reader, writer):
+        conn_id = self._next_conn
+        self._next_conn += 1
+        print("Client connected:", writer.get_extra_info('peername'))
+
+        def send(msg):
+            if writer.is_closing():
+                return # client is gone, results of jobs still in the batch are dropped
+            payload = json.dumps(msg, ensure_ascii=False).encode('utf-8')
+            writer.write(struct.pack("<I", len(payload)) + payload)
+
+        try:
+            while True:
+                stream_id, kind, size = HEADER.unpack(await reader.readexactly(HEADER.size))
+                payload = await reader.readexactly(size) if size else b''
+
+                key = (conn_id, stream_id)
+                stream = self.streams.get(key)
+                if stream is None:
+                    vad_model = await asyncio.get_running_loop().run_in_executor(None, load_silero_vad)
+                    stream = ASRStream(stream_id, self.backend, send, self._wake, vad_model)
+                    self.streams[key] = stream
+
+                if kind == PCM:
+                    pcm = np.frombuffer(payload, dtype=np.int16)
+                    dispatch_vad_events(stream, stream.vad.process(pcm.astype(np.float32) / 32768))
+                elif kind == END:
+                    stream.commit_utterance()
+                    stream.closing = True
+                    self._wake.set()
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            print("Client disconnected:", writer.get_extra_info('peername'))
+        finally:
+            for key in [k for k in self.streams if k[0] == conn_id]:
+                self.streams.pop(key).disconnected = True
+            writer.close()
+
+
+async def start_asr_server(host="127.0.0.1", port=5001, backend_name=ASR_BACKEND):
+    backend = get_backend(backend_name)
+    backend.model # load once, before any client connects
+    asr_server = ASRServer(backend)
+    server = await asyncio.start_server(asr_server.handle_client, host, port)
+    print(f"ASR server listening on {host}:{port}")
+    async with server:
+        await asyncio.gather(server.serve_forever(), asr_server.run_batches())
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(start_asr_server())
+    except KeyboardInterrupt:
+        print("Server Shutdown Successfully.")
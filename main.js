@@ -18,14 +18,30 @@ let isConnected = false;
 ocrClient.connect(PORT, HOST, () => {
   isConnected = true;
   console.log(`Connected to ${HOST}:${PORT}`);
+  // Hello control message (width 0, type 1): frames carry a pixel format and crop rect,
+  // and the server hands out credits ('ready' messages), one per frame we may send
+  const hello = Buffer.from(JSON.stringify({ pixel_format: true, credits: true }));
+  ocrClient.write(Buffer.from(new Uint32Array([0, 1, hello.length]).buffer));
+  ocrClient.write(hello);
 });
 
 let ocrOutput = {texts: [], scores: [], boxes: []}
+let ocrCredits = 0;
+// replies are length-prefixed (uint32 LE) JSON, TCP may split or join them across 'data' events
+let ocrPending = Buffer.alloc(0);
 ocrClient.on('data', (data) => {
-  const res = JSON.parse(data);
-  //console.log(res)
-  ocrOutput = res;
-  win.webContents.send("ocr-output-changed", ocrOutput)
+  ocrPending = Buffer.concat([ocrPending, data]);
+  while (ocrPending.length >= 4) {
+    const size = ocrPending.readUInt32LE(0);
+    if (ocrPending.length < 4 + size) break;
+    const res = JSON.parse(ocrPending.subarray(4, 4 + size).toString('utf-8'));
+    ocrPending = ocrPending.subarray(4 + size);
+    //console.log(res)
+    if (res.type === 'ready') ocrCredits += res.credits;
+    if (res.type) continue; // control replies (hello, ready, stats)
+    ocrOutput = res;
+    win.webContents.send("ocr-output-changed", ocrOutput)
+  }
 })
 
 ocrClient.on('close', () => {
@@ -45,6 +61,12 @@ ipcMain.on('ocr-request', async (event, metadata, pixbuf) => {
   ocrClient.write(pixbuf);
 })
 
+// The renderer asks before copying a frame, without a credit the server is still busy and the frame is dropped
+ipcMain.on('take-ocr-credit', (event) => {
+  event.returnValue = ocrCredits > 0;
+  if (ocrCredits > 0) ocrCredits--;
+});
+
 ipcMain.on('get-ocr-output', async (event) => {
   event.returnValue = ocrOutput;
 })
@@ -1,26 +1,126 @@
+import os
 import socket
 import struct
 import json
+import time
+import asyncio
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from collections import defaultdict, deque
+from functools import partial
+from itertools import count
 import numpy as np
 import matplotlib.pyplot as plt
 #from PIL import Image, ImageTk
 #import tkinter as tk
-from paddleocr import PaddleOCR
-import utils.language_processor as lang
+from utils.frame_ring import FrameRing
+from utils import pixel_formats as pf
+from utils.frame_change import FrameChangeDetector
+from utils.incremental_ocr import IncrementalOcr
+from utils.ocr_engine import create_engine
+from utils.ocr_pool import OcrWorkerPool
+from utils.ocr_cache import LineCache, predict_cached
 
-ocr = PaddleOCR(
-    use_doc_orientation_classify=False,
-    use_doc_unwarping=False,
-    use_textline_orientation=False,
-    #lang="en",
-    ocr_version="PP-OCRv4",
-    device="gpu",
-)
+# gpu | cpu | onnx (utils/ocr_engine.py), override per server instance with --profile
+OCR_PROFILE = "gpu"
+CPU_THREADS = None # cpu/onnx profiles, None = library default
+# Downscale frames so text lines come out about this tall (px) before OCR, None = full resolution
+TEXT_HEIGHT = None
+# OCR worker processes (utils/ocr_pool.py), 0 = OCR in the server process
+OCR_WORKERS = 0
+POOL_SLOT_SIZE = 1920 * 1080 * 3 # largest frame (after cropping/conversion) passed through shared memory
 
-prev_ocr_key = ""
-def is_same_frame(ocr_key):
-    if ocr_key == prev_ocr_key: return True
-    return False
+# Skip color conversion for YUV frames and OCR the luma (Y) plane only
+GRAYSCALE_OCR = False
+# Max change (0-255) of a block's mean brightness for a frame to count as unchanged and skip OCR
+CHANGE_THRESHOLD = 8.0
+# Keep detection boxes between frames and only recognize the lines that changed (utils/incremental_ocr.py),
+# not with OCR_WORKERS: frames of a client are spread over the workers
+INCREMENTAL_OCR = False
+# Cache recognized lines (and their segmentation) by crop hash across clients (utils/ocr_cache.py),
+# not with OCR_WORKERS. LINE_CACHE_DB keeps the entries in SQLite between runs.
+LINE_CACHE = False
+LINE_CACHE_SIZE = 4096
+LINE_CACHE_DB = None
+# Segment results on NLP threads and batch the tagging of concurrent clients for up to this many ms
+# (utils/tagger_service.py), None = segment on the OCR thread
+TAGGER_WINDOW_MS = None
+# Frames a client that asked for credits may send before its first 'ready' message
+FRAME_CREDITS = 1
+# Save every received frame as .npy here (replay them with tests/ocr/frame_change_bench.py)
+RECORD_DIR = None
+
+
+ocr = None # the server's OcrEngine, see load_ocr()
+ocr_pool = None # or its OcrWorkerPool
+_det_rec = None
+line_cache = None # the LineCache shared by all clients, if LINE_CACHE
+
+
+def load_ocr(profile=None, threads=None, text_height=None, **config):
+    """Create and load the OCR engine every client of this server instance shares."""
+    global ocr, _det_rec
+    ocr = create_engine(profile or OCR_PROFILE, threads=threads or CPU_THREADS,
+                        text_height=text_height or TEXT_HEIGHT, **config)
+    ocr.model # load now rather than on the first frame
+    _det_rec = None
+    return ocr
+
+
+def load_pool(workers, profile=None, threads=None, text_height=None, **config):
+    """Start OCR worker processes instead of an in-process engine, each worker loads its own model."""
+    global ocr_pool
+    ocr_pool = OcrWorkerPool(workers, profile or OCR_PROFILE, POOL_SLOT_SIZE, threads=threads or CPU_THREADS,
+                             text_height=text_height or TEXT_HEIGHT, **config)
+    ocr_pool.start()
+    return ocr_pool
+
+
+def load_line_cache(size=None, db_path=None):
+    global line_cache
+    line_cache = LineCache(size or LINE_CACHE_SIZE, db_path or LINE_CACHE_DB)
+    return line_cache
+
+
+def det_rec_models():
+    """Standalone detection and recognition models for incremental OCR and the line cache, loaded on first use."""
+    global _det_rec
+    if _det_rec is None:
+        _det_rec = ocr.det_rec()
+    return _det_rec
+
+
+_session_ids = count()
+
+
+class OcrSession:
+    """Per-connection state, so clients don't suppress each other's results."""
+    def __init__(self):
+        self.id = next(_session_ids)
+        self.prev_ocr_key = ""
+        self.change_detector = FrameChangeDetector(CHANGE_THRESHOLD)
+        self.frames = 0
+        self.scheduler = FrameScheduler()
+        self.ring = None
+        self.incremental = None
+        if INCREMENTAL_OCR and not ocr_pool:
+            self.incremental = IncrementalOcr(*det_rec_models(), threshold=CHANGE_THRESHOLD)
+
+    def is_same_frame(self, ocr_key):
+        if ocr_key == self.prev_ocr_key: return True
+        return False
+
+    def record(self, frame):
+        os.makedirs(RECORD_DIR, exist_ok=True)
+        np.save(os.path.join(RECORD_DIR, f"{self.id:03d}_{self.frames:06d}.npy"), frame)
+
+    def stats(self):
+        stats = {'frames': self.frames, **self.change_detector.stats(), **self.scheduler.stats()}
+        if self.incremental: stats.update(self.incremental.stats())
+        if line_cache: stats['line_cache'] = line_cache.stats()
+        import utils.language_processor as lang
+        stats['segment_cache'] = lang.segment_cache.stats()
+        return stats
 
 
 def recv_exact(sock, size):
@@ -33,65 +133,425 @@ def recv_exact(sock, size):
         buf += chunk
     return buf
 
-def start_ocr_server(host="127.0.0.1", port=5000):
+
+def recv_exact_into(sock, view):
+    """Fill the memoryview 'view' from the socket without intermediate copies."""
+    while len(view):
+        n = sock.recv_into(view)
+        if n == 0:
+            raise ConnectionError("Client disconnected")
+        view = view[n:]
+
+
+async def sock_recv_exact_into(loop, sock, view):
+    """Asyncio version of recv_exact_into for non-blocking sockets."""
+    while len(view):
+        n = await loop.sock_recv_into(sock, view)
+        if n == 0:
+            raise ConnectionError("Client disconnected")
+        view = view[n:]
+
+
+class FramePool:
+    """
+    Reusable receive buffers keyed by frame size. A crop region keeps the same size between frames,
+    so after the first frame every receive lands in an existing buffer.
+    """
+    def __init__(self, max_per_size=4):
+        self.max_per_size = max_per_size
+        self._free = defaultdict(list)
+
+    def acquire(self, size):
+        free = self._free[size]
+        return free.pop() if free else bytearray(size)
+
+    def release(self, buf):
+        free = self._free[len(buf)]
+        if len(free) < self.max_per_size:
+            free.append(buf)
+
+
+class PendingFrame:
+    """A received frame waiting for OCR: the raw payload and how to hand its buffer back."""
+    def __init__(self, buf, fmt, width, height, crop, release):
+        self.buf = buf
+        self.fmt = fmt
+        self.width = width
+        self.height = height
+        self.crop = crop
+        self.release = release
+        self.received = time.perf_counter()
+
+    def decode(self):
+        return pf.decode_frame(self.buf, self.fmt, self.width, self.height, self.crop, GRAYSCALE_OCR)
+
+
+class FrameScheduler:
+    """
+    Keeps at most one pending frame per client. A newer frame replaces (drops) the one waiting,
+    so OCR always runs on the most recent frame however far capture is ahead of it.
+    Clients that asked for credits get a 'ready' message each time the pending slot frees up,
+    which paces their capture to the measured OCR time instead of filling the socket buffer.
+    """
+    def __init__(self):
+        self.pending = None
+        self.credits = False
+        self.closed = False
+        self.wake = asyncio.Event()
+        self.received = 0
+        self.dropped = 0
+        self.ocr_time = 0.0 # moving average, s
+        self.queue_ages = deque(maxlen=100) # s between receiving a frame and starting its OCR
+
+    def put(self, frame):
+        self.received += 1
+        if self.pending:
+            self.pending.release()
+            self.dropped += 1
+        self.pending = frame
+        self.wake.set()
+
+    async def get(self):
+        """The newest pending frame, or None once the client is gone."""
+        while not self.pending and not self.closed:
+            self.wake.clear()
+            await self.wake.wait()
+        frame, self.pending = self.pending, None
+        if frame: self.queue_ages.append(time.perf_counter() - frame.received)
+        return frame
+
+    def done(self, elapsed):
+        self.ocr_time = elapsed if not self.ocr_time else 0.8 * self.ocr_time + 0.2 * elapsed
+
+    def ready_message(self, credits=1):
+        return {'type': 'ready', 'credits': credits, 'ocr_ms': round(self.ocr_time * 1000, 1)}
+
+    def close(self):
+        self.closed = True
+        if self.pending:
+            self.pending.release()
+            self.pending = None
+        self.wake.set()
+
+    def stats(self):
+        ages = np.array(self.queue_ages) * 1000 if self.queue_ages else np.zeros(1)
+        return {
+            'received': self.received,
+            'dropped': self.dropped,
+            'queue_age_ms': round(float(ages.mean()), 1),
+            'queue_age_p99_ms': round(float(np.percentile(ages, 99)), 1),
+            'ocr_ms': round(self.ocr_time * 1000, 1),
+        }
+
+
+def frame_changed(frame, session):
+    session.frames += 1
+    if RECORD_DIR: session.record(frame)
+    # Nearly identical to the last processed frame, skip detection and recognition entirely
+    return session.change_detector.changed(frame)
+
+
+def run_ocr(frame, session):
+    """OCR a frame, returns the grouped and segmented results or None if the frame/text didn't change."""
+    if not frame_changed(frame, session): return None
+    return process_result(predict(frame, session), session)
+
+
+def predict(frame, session):
+    if session.incremental: return session.incremental.predict(frame)
+    if line_cache: return predict_cached(*det_rec_models(), frame, line_cache)
+    return ocr.predict(frame)
+
+
+def process_result(res, session):
+    """Filter, dedupe against the session's last text, group lines and segment them. Call in frame order."""
+    # imported here so OCR worker processes, which import this module, skip the NLP libraries
+    import utils.language_processor as lang
+    #print(result)
+
+    rec_thres = 0.85
+    data = { 'texts': [], 'boxes': [] }
+    line_keys = {} # text -> line cache key
+    for i in range(len(res[0]['rec_texts'])):
+        if res[0]['rec_scores'][i] > rec_thres:
+            data['texts'].append(res[0]['rec_texts'][i])
+            data['boxes'].append(res[0]['rec_boxes'][i].tolist())
+            if 'line_keys' in res[0]: line_keys[res[0]['rec_texts'][i]] = res[0]['line_keys'][i]
+
+    # Do not update if the ocr results do not change 
+    cur_ocr_key = "".join(data['texts']).strip()
+    if session.is_same_frame(cur_ocr_key): return None
+    session.prev_ocr_key = cur_ocr_key
+    if not data['texts']: return data
+
+    # Group lines and split into words
+    data = lang.group_lines(data)
+    if not line_keys:
+        data['texts'] = lang.batch_split_to_words(data['texts'])
+        return data
+
+    # Groups that are a single cached line reuse its segmentation, only the rest go through HanLP
+    words = [None] * len(data['texts'])
+    todo = []
+    for i, text in enumerate(data['texts']):
+        key = line_keys.get(text)
+        entry = line_cache.get(key) if key else None # locked, may also find the words on disk
+        if entry and entry['words'] is not None: words[i] = entry['words']
+        else: todo.append(i)
+    if todo:
+        cacheable = lang.tagger.ready # not the jieba stand-in used while HanLP loads
+        for i, w in zip(todo, lang.batch_split_to_words([data['texts'][i] for i in todo])):
+            words[i] = w
+            if cacheable and data['texts'][i] in line_keys: line_cache.set_words(line_keys[data['texts'][i]], w)
+    data['texts'] = words if None not in words else [] # [] like batch_split_to_words on a tagger error
+    return data
+
+
+def encode_reply(data):
+    """Length-prefixed JSON: <I payload size followed by the UTF-8 payload."""
+    payload = json.dumps(data).encode('utf-8')
+    return struct.pack("<I", len(payload)) + payload
+
+
+# PaddleOCR isn't thread-safe, every client's frames go through this single worker
+ocr_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ocr")
+# grouping and segmentation with TAGGER_WINDOW_MS, one client's results are still handled in order
+nlp_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="nlp")
+
+frame_pool = FramePool()
+
+# Control messages share the frame header: width == 0 marks a control message,
+# height is the message type and frame_size the length of its JSON payload.
+CTRL = 0
+CTRL_HELLO = 1 # {'transport': 'shm', 'name': ..., 'slots': ..., 'slot_size': ...,
+               #  'pixel_format': True, 'credits': True}
+CTRL_STATS = 2 # {} -> {'type': 'stats', 'frames': ..., 'processed': ..., 'skipped': ..., ...}
+
+# With 'pixel_format' in the hello, every frame header is followed by
+# <IIIII pixel format, crop x, crop y, crop width, crop height (crop width 0 = whole frame),
+# width/height describe the full captured frame and the server crops and converts it.
+FORMAT_HEADER = struct.Struct("<IIIII")
+
+
+def negotiate_transport(hello):
+    """
+    Attach to the client's shared memory frame ring if it asks for one. After that frames
+    are sent as the usual header followed by a <I slot index instead of the pixels.
+    Returns None (frames keep coming over TCP) if the ring can't be used.
+    """
+    if hello.get('transport') != 'shm':
+        return None
+    try:
+        return FrameRing.attach(hello['name'], hello['slots'], hello['slot_size'])
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Shared memory transport unavailable, falling back to TCP: {e}")
+        return None
+
+
+def release_slot(ring, slot, view):
+    view.release()
+    ring.release(slot)
+
+
+def decode_and_predict(pending, session):
+    # color conversion runs in the OCR thread too, off the event loop
+    frame = pending.decode()
+    #plt.imshow(frame)
+    #plt.show()
+    if not frame_changed(frame, session): return None
+    return predict(frame, session)
+
+
+def decode_into_slot(pending, session, slot):
+    """Pool version of decode_and_predict: the frame is copied to a worker slot, (frame, in_slot) or None."""
+    frame = pending.decode()
+    if not frame_changed(frame, session): return None
+    in_slot = ocr_pool.write(slot, frame)
+    if not in_slot:
+        # too big for a slot, the job queue pickles it later on its feeder thread: the frame may be a view
+        # of the receive buffer, which is reused as soon as this returns
+        frame = np.array(frame, copy=True)
+    return frame, in_slot
+
+
+async def predict_frame(pending, session):
+    """Raw OCR result of a pending frame (None if unchanged), its buffer is released once decoded."""
+    loop = asyncio.get_running_loop()
+    if not ocr_pool:
+        try:
+            return await loop.run_in_executor(ocr_executor, decode_and_predict, pending, session)
+        finally:
+            pending.release()
+
+    slot = await ocr_pool.acquire_slot()
+    try:
+        decoded = await loop.run_in_executor(ocr_executor, decode_into_slot, pending, session, slot)
+    except BaseException:
+        ocr_pool.release_slot(slot)
+        raise
+    finally:
+        pending.release()
+    if decoded is None:
+        ocr_pool.release_slot(slot)
+        return None
+    frame, in_slot = decoded
+    return await ocr_pool.submit(slot, frame, in_slot)
+
+
+async def receive_frames(conn, session, reply):
+    """Read control messages and frames from the client, frames go to the session's scheduler."""
+    loop = asyncio.get_running_loop()
+    scheduler = session.scheduler
+    header = bytearray(12)
+    format_header = bytearray(FORMAT_HEADER.size)
+    slot_header = bytearray(4)
+    pixel_format = False
+    while True:
+        # Metadata: width, height, frame_size | 32-bit uint
+        await sock_recv_exact_into(loop, conn, memoryview(header))
+        width, height, frame_size = struct.unpack("<III", header)
+        #print(width, height, frame_size)
+
+        if width == CTRL:
+            msg = bytearray(frame_size)
+            await sock_recv_exact_into(loop, conn, memoryview(msg))
+            if height == CTRL_HELLO:
+                hello = json.loads(msg)
+                if session.ring: session.ring.close()
+                session.ring = negotiate_transport(hello)
+                pixel_format = bool(hello.get('pixel_format'))
+                scheduler.credits = bool(hello.get('credits'))
+                await reply({
+                    'type': 'hello',
+                    'transport': 'shm' if session.ring else 'tcp',
+                    'pixel_formats': list(pf.FORMAT_NAMES.values()) if pixel_format else ["RGB"],
+                })
+                if scheduler.credits: await reply(scheduler.ready_message(FRAME_CREDITS))
+            elif height == CTRL_STATS:
+                await reply({'type': 'stats', **session.stats()})
+            continue
+
+        fmt, crop = pf.RGB, None
+        if pixel_format:
+            await sock_recv_exact_into(loop, conn, memoryview(format_header))
+            fmt, *crop = FORMAT_HEADER.unpack(format_header)
+        if frame_size < pf.frame_size(fmt, width, height):
+            raise ValueError(f"{frame_size} bytes is too small for a {width}x{height} {pf.FORMAT_NAMES.get(fmt)} frame")
+
+        if session.ring:
+            # --- Pixbuf is already in shared memory, only the slot index comes over the socket ---
+            await sock_recv_exact_into(loop, conn, memoryview(slot_header))
+            slot, = struct.unpack("<I", slot_header)
+            view = session.ring.slot_view(slot, frame_size)
+            release = partial(release_slot, session.ring, slot, view)
+            scheduler.put(PendingFrame(view, fmt, width, height, crop, release))
+        else:
+            # --- Receive Pixbuf --- straight into a pooled buffer, the frame is decoded from it
+            buf = frame_pool.acquire(frame_size)
+            try:
+                await sock_recv_exact_into(loop, conn, memoryview(buf))
+            except BaseException:
+                frame_pool.release(buf)
+                raise
+            scheduler.put(PendingFrame(buf, fmt, width, height, crop, partial(frame_pool.release, buf)))
+
+
+async def ocr_loop(session, reply):
+    """
+    OCR the client's newest pending frame whenever the previous one is done. With worker processes
+    up to OCR_WORKERS frames are in OCR at once, their results are still handled in frame order.
+    """
+    loop = asyncio.get_running_loop()
+    scheduler = session.scheduler
+    depth = ocr_pool.workers if ocr_pool else 1
+    inflight = deque() # (start time, task) in frame order
+
+    async def finish():
+        start, task = inflight.popleft()
+        res = await task
+        scheduler.done(time.perf_counter() - start)
+        if res is None: return
+        executor = nlp_executor if TAGGER_WINDOW_MS is not None else ocr_executor
+        data = await loop.run_in_executor(executor, process_result, res, session)
+        # --- Send OCR results to client ---
+        if data is not None: await reply(data)
+
+    try:
+        while True:
+            if inflight and (len(inflight) >= depth or not scheduler.pending):
+                await finish()
+                continue
+            pending = await scheduler.get()
+            if pending is None: break
+            # the pending slot is free again, the client may send its next frame
+            if scheduler.credits: await reply(scheduler.ready_message())
+            inflight.append((time.perf_counter(), loop.create_task(predict_frame(pending, session))))
+    finally:
+        # frames already in OCR still hold buffers, let them finish
+        for _, task in inflight:
+            try:
+                await task
+            except Exception:
+                pass
+
+
+async def handle_client(conn, addr):
+    print("Client connected:", addr)
+    session = OcrSession()
+    loop = asyncio.get_running_loop()
+    send_lock = asyncio.Lock() # replies come from both tasks, don't interleave them
+
+    async def reply(data):
+        async with send_lock:
+            await loop.sock_sendall(conn, encode_reply(data))
+
+    receiver = loop.create_task(receive_frames(conn, session, reply))
+    worker = loop.create_task(ocr_loop(session, reply))
+    try:
+        await asyncio.wait([receiver, worker], return_when=asyncio.FIRST_COMPLETED)
+        receiver.cancel()
+        session.scheduler.close() # the worker finishes the frame it is on, then stops
+        for task in (receiver, worker):
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+            except OSError: # ConnectionError, or a reply to a closed socket
+                print("Client disconnected:", addr)
+            except (ValueError, IndexError) as e:
+                # eg. a payload smaller than its pixel format needs, the stream can't be trusted after that
+                print(f"Bad frame from {addr}: {e}")
+    finally:
+        print("Client stats:", addr, session.stats())
+        if session.ring: session.ring.close()
+        conn.close()
+
+
+async def start_ocr_server(host="127.0.0.1", port=5000):
+    if ocr is None and ocr_pool is None: load_ocr()
+    if LINE_CACHE and not ocr_pool and line_cache is None: load_line_cache()
+    if (INCREMENTAL_OCR or line_cache) and not ocr_pool: det_rec_models() # load before accepting clients, not inside the event loop later
     # --- Setup socket ---
     server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     # Allow reuse of address
     server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
 
     server.bind((host, port))
-    server.listen(1)
+    server.listen()
+    server.setblocking(False)
     print(f"Server listening on {host}:{port}")
-    
-    while True:
-        conn = None
-        try:
-            conn, addr = server.accept()
-            print("Client connected:", addr)
-
-            while True:
-                # Metadata: width, height, frame_size | 32-bit float
-                header = recv_exact(conn, 12)
-                width, height, frame_size = struct.unpack("<III", header)
-                #print(width, height, frame_size)
-
-                # --- Receive Pixbuf ---
-                frame_bytes = recv_exact(conn, frame_size)
-                frame = np.frombuffer(frame_bytes, dtype=np.uint8).reshape((height, width, 3)) # RGB
-
-                #plt.imshow(frame)
-                #plt.show()
-
-                # --- Send OCR results to client ---
-                res = ocr.predict(frame)
-                #print(result)
-
-                rec_thres = 0.85
-                data = { 'texts': [], 'boxes': [] }
-                for i in range(res[0]['rec_texts']):
-                    if res[0]['rec_scores'][i] > rec_thres:
-                        data['texts'].append(res[0]['rec_texts'][i])
-                        data['boxes'].append(res[0]['rec_boxes'][i].tolist())
-
-                # Do not update if the ocr results do not change 
-                cur_ocr_key = "".join(data['texts']).strip()
-                if is_same_frame(): continue
-                prev_ocr_key = cur_ocr_key
-
-                # Group lines and split into words
-                data = lang.group_lines(data)
-                data['texts'] = lang.batch_split_to_words(data['texts'])
-
-                conn.send(json.dumps(data).encode('utf-8'))
-        except ConnectionError:
-            print("Client disconnected, waiting for reconnection...")
-            conn.close()
-        except KeyboardInterrupt:
-            if conn: conn.close()
-            server.close()
-            print("Server Shutdown Successfully.")
-            break
 
+    loop = asyncio.get_running_loop()
+    clients = set() # keep references to the client tasks
+    try:
+        while True:
+            conn, addr = await loop.sock_accept(server)
+            conn.setblocking(False)
+            task = loop.create_task(handle_client(conn, addr))
+            clients.add(task)
+            task.add_done_callback(clients.discard)
+    finally:
+        server.close()
 
 
 """
@@ -134,4 +594,39 @@ def start_ocr_server(host="127.0.0.1", port=5000):
 
 
 if __name__ == "__main__":
-    start_ocr_server()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--profile", default=OCR_PROFILE, help="gpu | cpu | onnx")
+    parser.add_argument("--threads", type=int, default=CPU_THREADS)
+    parser.add_argument("--text-height", type=int, default=TEXT_HEIGHT)
+    parser.add_argument("--workers", type=int, default=OCR_WORKERS, help="OCR worker processes, 0 = in process")
+    parser.add_argument("--det-model", help="onnx profile: exported detection model")
+    parser.add_argument("--rec-model", help="onnx profile: exported recognition model")
+    parser.add_argument("--rec-dict", help="onnx profile: charset file, if the model doesn't carry it")
+    parser.add_argument("--line-cache", action="store_true", default=LINE_CACHE, help="cache recognized lines by crop hash")
+    parser.add_argument("--line-cache-db", default=LINE_CACHE_DB, help="SQLite file for the line cache (implies --line-cache)")
+    parser.add_argument("--segment-cache-db", help="SQLite file that keeps segmentation results between runs")
+    parser.add_argument("--tagger-window", type=float, default=TAGGER_WINDOW_MS,
+                        help="ms to collect segmentation requests of concurrent clients into one batch")
+    args = parser.parse_args()
+
+    models = {k: v for k, v in (('det_model', args.det_model), ('rec_model', args.rec_model),
+                                ('rec_dict', args.rec_dict)) if v}
+    if args.workers:
+        load_pool(args.workers, args.profile, args.threads, args.text_height, **models)
+    else:
+        load_ocr(args.profile, args.threads, args.text_height, **models)
+        if args.line_cache or args.line_cache_db: load_line_cache(db_path=args.line_cache_db)
+    import utils.language_processor as lang
+    lang.tagger.warmup() # HanLP loads in the background, after the workers are started, jieba until then
+    if args.segment_cache_db: lang.use_segment_cache(db_path=args.segment_cache_db)
+    if args.tagger_window is not None:
+        TAGGER_WINDOW_MS = args.tagger_window
+        lang.use_tagger_service(TAGGER_WINDOW_MS)
+    try:
+        asyncio.run(start_ocr_server(args.host, args.port))
+    except KeyboardInterrupt:
+        print("Server Shutdown Successfully.")
+    finally:
+        if ocr_pool: ocr_pool.close() # stop the workers and unlink the shared memory ring
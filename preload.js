@@ -3,6 +3,7 @@ const { contextBridge, ipcRenderer, webUtils } = require('electron');
 contextBridge.exposeInMainWorld('superLinguist', {
     print: (str) => ipcRenderer.send('print', str),
     sendOcrRequest: (metadata, pixbuf) => ipcRenderer.send('ocr-request', metadata, pixbuf),
+    takeOcrCredit: () => ipcRenderer.sendSync('take-ocr-credit'),
     getOcrOutput: () => ipcRenderer.sendSync('get-ocr-output'), // UNUSED
     onOcrOutputChanged: (callback) => 
         ipcRenderer.on("ocr-output-changed", async (_, value) => 
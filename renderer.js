@@ -1,4 +1,5 @@
-import * as formatUtils from './formatUtils.js'
+// VideoFrame.format -> pixel format code of the OCR frame header
+const PIXEL_FORMATS = { RGBA: 1, RGBX: 1, BGRA: 2, BGRX: 2, I420: 3, NV12: 4 };
 
 document.addEventListener('DOMContentLoaded', () => {
   const cropFrame = document.getElementById('cropFrame');
@@ -267,49 +268,39 @@ document.addEventListener('DOMContentLoaded', () => {
 
       const frame = result.value; // VideoFrame
 
+      // Pixel format code, the server does the color conversion (see utils/pixel_formats.py)
+      const format = PIXEL_FORMATS[frame.format];
+      if (format === undefined) {
+        console.log("Unsupported frame format:", frame.format);
+        frame.close();
+        readFrame();
+        return;
+      }
+
+      // The server is still busy with an earlier frame, skip this one before copying it
+      if (!window.superLinguist.takeOcrCredit()) {
+        frame.close();
+        readFrame();
+        return;
+      }
+
       // Get raw bytes
       const data = new Uint8Array(frame.allocationSize());
       await frame.copyTo(data);
 
-      // Convert data to RGB
-      //console.log(frame.format);
-      let rgbData;
-      if (frame.format == 'I420') {
-        rgbData = formatUtils.i420ToRgb(data, frame.displayWidth, frame.displayHeight);
-      } else if (frame.format == "NV12") {
-        rgbData = formatUtils.nv12ToRgb(data, frame.displayWidth, frame.displayHeight);
-      } else {
-        rgbData = data;
-      }
-
-      // Crop using normalized rectangle
+      // Crop rectangle in frame pixels, the server crops before converting
       const rect = calculateNormRect();
       const cropLeft = Math.round(frame.displayWidth * rect.pos[0]);
       const cropTop = Math.round(frame.displayHeight * rect.pos[1]);
       const cropWidth = Math.round(frame.displayWidth * rect.size[0]);
       const cropHeight = Math.round(frame.displayHeight * rect.size[1]);
 
-      // Extract cropped pixels (RGB format, 3 bytes per pixel)
-      const bytesPerPixel = 3;
-      const stride = frame.displayWidth * bytesPerPixel;
-      const croppedData = new Uint8Array(cropWidth * cropHeight * bytesPerPixel);
-
-      for (let y = 0; y < cropHeight; y++) {
-        const srcOffset = ((cropTop + y) * frame.displayWidth + cropLeft) * bytesPerPixel;
-        const dstOffset = y * cropWidth * bytesPerPixel;
-        croppedData.set(rgbData.slice(srcOffset, srcOffset + cropWidth * bytesPerPixel), dstOffset);
-      }
-
-      /*console.log(
-          "cropFrame:", frame.displayWidth, frame.displayHeight,
-          "cropped to:", cropWidth, cropHeight,
-          "at pos:", cropLeft, cropTop,
-          "bytes", rgbData.length,
-          "cropped bytes:", croppedData.length
-      ); */
-
-      const metadata = new Uint32Array([cropWidth, cropHeight, croppedData.length]);
-      window.superLinguist.sendOcrRequest(metadata, croppedData);
+      // width, height, frame_size | format, crop x, crop y, crop width, crop height
+      const metadata = new Uint32Array([
+        frame.displayWidth, frame.displayHeight, data.length,
+        format, cropLeft, cropTop, cropWidth, cropHeight
+      ]);
+      window.superLinguist.sendOcrRequest(metadata, data);
 
       frame.close();
       readFrame();
@@ -4,59 +4,136 @@ conda: funasr
 
 # FasterWhisper requires cuDNN and cuBLAS (install from Nvidia website)
 # TODO: test how well this performs on audio with a lot of noise eg: background music and sfx. If the performance is lackluster, then consider adding a neural voice isolator step before ASR.
-# TODO: Get inference working on a separate thread so that inference can happen in shorter intervals than VAD silence removal 
-# however if inference step is shorter than VAD step, then if vad does detect the 
 
-import torch
 import asyncio
 import numpy as np
-import soundfile as sf
-from pydub import AudioSegment
-from difflib import SequenceMatcher
 from typing import Callable, Optional
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
 import io
+import os
+import time
 
-import soundcard as sc
-from silero_vad import (load_silero_vad,
-                        read_audio,
-                        get_speech_timestamps,
-                        save_audio,
-                        VADIterator,
-                        collect_chunks)
-
-from funasr import AutoModel
-model = AutoModel(model="paraformer-zh", 
-                  #punc_model="ct-punc", 
-                  disable_update=True
-)
+# models (funasr, silero, torch) and audio libraries are imported lazily so importing this module is cheap
+from utils.asr_backends import ASRBackend, get_backend
 
 # CONFIG
+ASR_BACKEND = "paraformer"     # see utils/asr_backends.py: paraformer, paraformer-streaming, faster-whisper, fireredasr, dummy
 SAMPLE_RATE = 16000            # model expected sample rate
 CHANNELS = 1
 CONTEXT_SECONDS = 15.0         # fixed size moving window (change as needed)
 STEP_SECONDS = 1.0             # how often to run inference (controls latency)
 CHUNK_SIZE = SAMPLE_RATE * STEP_SECONDS
+VAD_THRESHOLD = 0.5            # silero speech probability threshold
+VAD_MIN_SILENCE_MS = 500       # silence needed before an utterance is considered finished (hangover)
+VAD_SPEECH_PAD_MS = 100        # audio kept around speech so word onsets/endings aren't clipped
+AGREEMENT_N = 2                # text is committed once it is stable across this many consecutive decodes
+INCREMENTAL = False            # decode only new audio with paraformer-zh-streaming instead of re-decoding the whole window
+
+# paraformer-zh-streaming settings (see tests/asr/paraformer_test.py)
+STREAMING_CHUNK_SIZE = [0, 10, 5] # 10*60ms = 600ms per chunk, 5*60ms = 300ms lookahead
+ENCODER_CHUNK_LOOK_BACK = 4       # number of chunks to lookback for encoder self-attention
+DECODER_CHUNK_LOOK_BACK = 1       # number of encoder chunks to lookback for decoder cross-attention
 
 
 class RollingBuffer:
-    def __init__(self, context_seconds: float, sample_rate: int):
+    def __init__(self, context_seconds: float, sample_rate: int, ring: bool = True):
         self.sample_rate = sample_rate
         self.context_seconds = context_seconds
         self.max_samples = int(context_seconds * sample_rate)
-        self.buffer = np.zeros((0,), dtype=np.int16)  # store int16 PCM
+        # ring mode: storage is allocated once and appends are O(chunk).
+        # otherwise every append concatenates and slices the whole window.
+        self.ring = ring
+        if ring:
+            # mirrored ring: storage[i + max_samples] == storage[i], so the window is always
+            # the contiguous slice storage[_start:_start + _size] and reading it never copies
+            self._storage = np.zeros((2 * self.max_samples,), dtype=np.int16)
+            self._start = 0 # index of the oldest sample, < max_samples
+            self._size = 0
+        else:
+            self._buffer = np.zeros((0,), dtype=np.int16)  # store int16 PCM
+        self._total = 0 # samples appended since creation, gives every sample an absolute position
+        # float32 copy handed to the model, reused between steps
+        self._float = np.zeros((self.max_samples,), dtype=np.float32)
+
+    @property
+    def buffer(self) -> np.ndarray:
+        """Contiguous view of the window (oldest sample first)."""
+        if not self.ring:
+            return self._buffer
+        return self._storage[self._start:self._start + self._size]
 
     def append(self, pcm16: np.ndarray):
         """Append new int16 PCM chunk; keep only last max_samples."""
         if pcm16.dtype != np.int16:
             raise ValueError("pcm16 must be int16")
-        self.buffer = np.concatenate((self.buffer, pcm16), axis=0)
-        if len(self.buffer) > self.max_samples:
-            # keep last max_samples
-            self.buffer = self.buffer[-self.max_samples :]
+        self._total += len(pcm16)
+        if not self.ring:
+            self._buffer = np.concatenate((self._buffer, pcm16), axis=0)
+            if len(self._buffer) > self.max_samples:
+                # keep last max_samples
+                self._buffer = self._buffer[-self.max_samples :]
+            return
+
+        n = len(pcm16)
+        if n == 0:
+            return
+        m = self.max_samples
+        if n >= m:
+            # chunk alone fills the window
+            self._storage[:m] = pcm16[-m:]
+            self._storage[m:] = pcm16[-m:]
+            self._start = 0
+            self._size = m
+            return
+        # write position is right after the newest sample, every sample goes to both halves
+        pos = (self._start + self._size) % m
+        first = min(n, m - pos)
+        self._storage[pos:pos + first] = pcm16[:first]
+        self._storage[pos + m:pos + m + first] = pcm16[:first]
+        self._storage[:n - first] = pcm16[first:]
+        self._storage[m:m + n - first] = pcm16[first:]
+        overflow = self._size + n - self.max_samples
+        if overflow > 0:
+            # oldest samples were overwritten
+            self._start = (self._start + overflow) % self.max_samples
+            self._size = self.max_samples
+        else:
+            self._size += n
+
+    @property
+    def start_sample(self) -> int:
+        """Absolute position of the oldest sample in the window."""
+        return self._total - len(self)
 
+    def consume(self, n: int):
+        """Drop the oldest n samples (eg. audio whose transcript has been committed)."""
+        n = max(0, min(n, len(self)))
+        if n == 0:
+            return
+        if self.ring:
+            self._start = (self._start + n) % self.max_samples
+            self._size -= n
+        else:
+            self._buffer = self._buffer[n:]
+
+    def consume_until(self, position: int):
+        """Drop every sample before the absolute position `position`."""
+        self.consume(position - self.start_sample)
+
+    def get_float32(self) -> np.ndarray:
+        """Return the window as float32 PCM in [-1, 1].
+        The array is a view into a reused buffer and is overwritten by the next call."""
+        pcm = self.buffer
+        out = self._float[:len(pcm)]
+        np.multiply(pcm, np.float32(1.0 / 32768), out=out)
+        return out
+
+    # only used for debugging/dumping, inference takes get_float32() directly
     def get_wav_bytes(self) -> bytes:
         """Return the current buffer as WAV bytes (16kHz mono)."""
         # write to bytes using soundfile
+        import soundfile as sf
         bio = io.BytesIO()
         sf.write(bio, self.buffer.astype(np.int16), self.sample_rate, format="WAV", subtype="PCM_16")
         bio.seek(0)
@@ -64,7 +141,11 @@ class RollingBuffer:
     
     def clear(self):
         """Clear the buffer."""
-        self.buffer = np.zeros((0,), dtype=np.int16)
+        if self.ring:
+            self._start = 0
+            self._size = 0
+        else:
+            self._buffer = np.zeros((0,), dtype=np.int16)
 
     # unused but may be useful
     def get_samples(self) -> np.ndarray:
@@ -72,7 +153,10 @@ class RollingBuffer:
 
     # unused but may be useful
     def get_duration(self) -> float:
-        return len(self.buffer) / self.sample_rate
+        return len(self) / self.sample_rate
+
+    def __len__(self):
+        return self._size if self.ring else len(self._buffer)
 
 
 def pcm_float_to_int16(float_pcm: np.ndarray) -> np.ndarray:
@@ -81,104 +165,515 @@ def pcm_float_to_int16(float_pcm: np.ndarray) -> np.ndarray:
     return (clipped * 32767).astype(np.int16)
 
 
+class StreamingVAD:
+    """
+    Frame-level VAD on top of silero's VADIterator (see tests/asr/silero_vad_test.py).
+    Audio is processed in 512-sample frames and turned into an ordered list of events:
+        ('start', None)  speech started
+        ('audio', pcm)   float32 speech audio to forward to ASR
+        ('end', None)    speech ended after min_silence_ms of silence
+    Frames in a tentative silence are held back and dropped if the utterance ends,
+    so only speech (plus speech_pad_ms of padding) reaches the ASR model.
+    """
+    def __init__(self, model,
+                 sample_rate: int = SAMPLE_RATE,
+                 threshold: float = VAD_THRESHOLD,
+                 min_silence_ms: int = VAD_MIN_SILENCE_MS,
+                 speech_pad_ms: int = VAD_SPEECH_PAD_MS):
+        self.sample_rate = sample_rate
+        self.frame_size = 512 if sample_rate == 16000 else 256
+        import torch
+        from silero_vad import VADIterator
+        self._torch = torch
+        self.iterator = VADIterator(model,
+                                    threshold=threshold,
+                                    sampling_rate=sample_rate,
+                                    min_silence_duration_ms=min_silence_ms,
+                                    speech_pad_ms=speech_pad_ms)
+        self.pad_samples = sample_rate * speech_pad_ms // 1000
+        pad_frames = max(1, -(-self.pad_samples // self.frame_size))
+        self._rest = np.zeros((0,), dtype=np.float32) # samples that don't fill a frame yet
+        self._preroll = deque(maxlen=pad_frames) # recent silent frames, prepended when speech starts
+        self._hangover = [] # frames seen while the VAD waits to decide whether speech ended
+
+    @property
+    def in_speech(self) -> bool:
+        return bool(self.iterator.triggered)
+
+    def reset(self):
+        self.iterator.reset_states()
+        self._rest = np.zeros((0,), dtype=np.float32)
+        self._preroll.clear()
+        self._hangover = []
+
+    def process(self, block: np.ndarray) -> list:
+        """Run the VAD over a block of float32 PCM and return the events it produced, in order."""
+        block = np.concatenate((self._rest, block.astype(np.float32, copy=False)))
+        n_frames = len(block) // self.frame_size
+        self._rest = block[n_frames * self.frame_size:]
+
+        events = []
+        speech = [] # speech frames collected since the last event
+        def flush_speech():
+            if speech:
+                events.append(('audio', np.concatenate(speech)))
+                speech.clear()
+
+        for i in range(n_frames):
+            frame = block[i * self.frame_size:(i + 1) * self.frame_size]
+            was_speech = self.in_speech
+            res = self.iterator(self._torch.from_numpy(frame))
+
+            if res and 'start' in res:
+                events.append(('start', None))
+                speech.extend(self._preroll)
+                self._preroll.clear()
+                speech.append(frame)
+            elif res and 'end' in res:
+                # keep speech_pad_ms of the trailing silence, drop the rest
+                kept = 0
+                for f in self._hangover:
+                    if kept >= self.pad_samples: break
+                    speech.append(f)
+                    kept += len(f)
+                self._hangover = []
+                flush_speech()
+                events.append(('end', None))
+            elif was_speech:
+                if self.iterator.temp_end:
+                    self._hangover.append(frame) # possibly the end of the utterance
+                else:
+                    # speech resumed, the pause was part of the utterance
+                    speech.extend(self._hangover)
+                    self._hangover = []
+                    speech.append(frame)
+            else:
+                self._preroll.append(frame)
+
+        flush_speech()
+        return events
+
+
+def dispatch_vad_events(asr, events: list):
+    """Drive ASR from VAD events: feed speech audio and commit the utterance when speech ends."""
+    for event, pcm in events:
+        if event == 'audio':
+            asr.feed(pcm_float_to_int16(pcm))
+        elif event == 'end':
+            asr.commit_utterance()
+
+
+class LocalAgreement:
+    """Commit policy: the prefix shared by the last n hypotheses of the same window is considered stable."""
+    def __init__(self, n: int = AGREEMENT_N):
+        self.n = n
+        self.history = deque(maxlen=n)
+
+    def reset(self):
+        self.history.clear()
+
+    def update(self, hypothesis: str) -> str:
+        """Add a hypothesis and return the stable prefix ("" until n hypotheses have been seen)."""
+        self.history.append(hypothesis)
+        if len(self.history) < self.n:
+            return ""
+        return os.path.commonprefix(list(self.history))
+
+
+def parse_hypothesis(res: dict) -> tuple[str, Optional[list]]:
+    """
+    Return (text, times) from a funasr result, where times[i] is the [start_ms, end_ms]
+    of text[i], or None if the result has no usable timestamps.
+    """
+    tokens = res['text'].split()
+    text = "".join(tokens)
+    stamps = res.get('timestamp')
+    if not stamps:
+        return text, None
+    if len(stamps) == len(text):
+        return text, stamps
+    if len(stamps) == len(tokens):
+        # one timestamp per token, every char of the token shares it
+        return text, [st for tok, st in zip(tokens, stamps) for _ in tok]
+    return text, None
+
+
+def commit_cut_ms(times: Optional[list], n_chars: int) -> Optional[int]:
+    """Where to cut the audio after the first n_chars are committed: between the last committed char and the next one."""
+    if not times or n_chars == 0 or n_chars > len(times):
+        return None
+    end = times[n_chars - 1][1]
+    if n_chars < len(times) and times[n_chars][0] > end:
+        return (end + times[n_chars][0]) // 2
+    return end
+
+
+def estimate_cut_ms(n_chars: int, total_chars: int, window_ms: int) -> Optional[int]:
+    """commit_cut_ms without timestamps: the committed share of the window's chars, as a share of its audio."""
+    if n_chars == 0 or total_chars == 0:
+        return None
+    return window_ms * n_chars // total_chars
+
+
 class StreamingASR:
     def __init__(self,
-                 model,
+                 backend: ASRBackend,
                  buffer: RollingBuffer,
                  step_seconds: float,
-                 emit_callback: Callable[[str], None],
+                 emit_callback: Callable[['StreamingASR', str, str], None],
                  sample_rate: int = SAMPLE_RATE,
-                 lang: Optional[str] = None):
-        self.model = model
+                 lang: Optional[str] = None,
+                 dump_path: Optional[str] = None,
+                 agreement_n: int = AGREEMENT_N):
+        self.backend = backend
         self.buffer = buffer
         self.step_seconds = step_seconds
         self.emit_cb = emit_callback
         self.sample_rate = sample_rate
         self.lang = lang
+        self.dump_path = dump_path # if set, the window is written here as WAV on every step (debug only)
 
-        self.vad_model = load_silero_vad()
+        self._vad_model = None
 
-        self.full_text = ""
+        # the transcript of the current utterance is split into committed text (final, its audio has been
+        # trimmed from the buffer) and tentative text (may still change on the next decode)
+        self.committed_text = ""
+        self.tentative_text = ""
         self.text_outputs = []
+        self.agreement = LocalAgreement(agreement_n)
+        self._window_committed = 0 # chars of the current window's hypothesis that are already committed
         self._lock = asyncio.Lock()
 
+        # model.generate blocks, so it runs on a dedicated worker thread while capture keeps filling the buffer.
+        # requests made while the worker is busy are coalesced: only the newest buffer snapshot is decoded.
+        self._executor = None # created on the first decode, streams decoded by ASRServer never need one
+        self._pending = asyncio.Event()
+        self._worker = None
+        self._inflight = False
+        self._epoch = 0 # bumped on every utterance commit, results decoded before it are stale
+        self._finals = deque() # remaining audio of ended utterances, waiting for their final decode
+
+        # counters
+        self.requested_steps = 0
+        self.completed_steps = 0
+        self.skipped_steps = 0 # requests dropped because a newer one replaced them
+        self.step_latencies = deque(maxlen=10000) # seconds spent in the backend per step
+
+    @property
+    def vad_model(self):
+        if self._vad_model is None:
+            from silero_vad import load_silero_vad
+            self._vad_model = load_silero_vad()
+        return self._vad_model
+
+    @property
+    def full_text(self) -> str:
+        return self.committed_text + self.tentative_text
+
+    def _emit(self, committed_delta: str, tentative: str):
+        """Update the transcript and send only what changed to emit_callback."""
+        if not committed_delta and tentative == self.tentative_text:
+            return
+        self.committed_text += committed_delta
+        self.tentative_text = tentative
+        self.emit_cb(self, committed_delta, tentative)
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of inference requests waiting or running (at most 2 with latest-wins scheduling)."""
+        return int(self._pending.is_set()) + int(self._inflight)
+
+    def stats(self) -> dict:
+        return {
+            'queue_depth': self.queue_depth,
+            'requested_steps': self.requested_steps,
+            'completed_steps': self.completed_steps,
+            'skipped_steps': self.skipped_steps,
+        }
+
+    def feed(self, pcm16: np.ndarray):
+        """Add captured int16 PCM and schedule a decode."""
+        self.buffer.append(pcm16)
+        self.request_infer()
+
+    def request_infer(self):
+        """Ask for a decode of the newest buffer contents without blocking the caller."""
+        self.requested_steps += 1
+        if self._pending.is_set():
+            # the previous request never started, the newer snapshot replaces it
+            self.skipped_steps += 1
+        self._pending.set()
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.get_running_loop().create_task(self._infer_loop())
+
+    async def _infer_loop(self):
+        while True:
+            await self._pending.wait()
+            self._pending.clear()
+            try:
+                await self.infer_once()
+            except Exception as e:
+                # one failed decode must not stop the worker, the next request decodes a newer window
+                print(f"ASR step failed: {e!r}")
+
+    async def stop(self):
+        if self._worker:
+            self._worker.cancel()
+            self._worker = None
+        if self._executor:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def commit_utterance(self):
+        """
+        End the current utterance: the audio left in the window gets one final decode on the worker,
+        then the transcript moves into text_outputs. Capture can start the next utterance right away.
+        """
+        self._epoch += 1
+        samples = self.buffer.get_float32().copy() if len(self.buffer) else None
+        self.buffer.clear()
+        self._finals.append(samples)
+        self.request_infer()
+
+    async def _finish_utterance(self, samples: Optional[np.ndarray]):
+        res = None
+        if samples is not None:
+            try:
+                res = await self._run_step(self.backend.transcribe_pcm, samples)
+            except Exception as e:
+                print(f"Final ASR decode failed, keeping the tentative text: {e!r}")
+        self._apply_final(res)
+
+    def _apply_final(self, res: Optional[dict]):
+        """Commit the final decode of an utterance (or its last tentative text if it had no audio left)."""
+        if res is not None:
+            text, _ = parse_hypothesis(res)
+            self._emit(text[self._window_committed:], "")
+        else:
+            # whatever is still tentative is final now
+            self._emit(self.tentative_text, "")
+        self.agreement.reset()
+        self._window_committed = 0
+        if self.committed_text:
+            self.text_outputs.append(self.committed_text)
+            self.committed_text = ""
+
+    async def _run_step(self, fn, *args):
+        """Run a blocking backend call on the inference thread and record its latency."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="asr-infer")
+        self._inflight = True
+        start = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self._inflight = False
+            self.completed_steps += 1
+            self.step_latencies.append(time.perf_counter() - start)
+
+    async def drain(self):
+        """Wait until every requested decode has finished."""
+        while self.queue_depth or self._lock.locked():
+            await asyncio.sleep(0.005)
+
     async def infer_once(self):
         # ensure we do only one inference at a time
         async with self._lock:
-            wav_bytes = self.buffer.get_wav_bytes()
-            if len(wav_bytes) == 0:
+            # utterances that ended are finished before the new window is decoded
+            while self._finals:
+                await self._finish_utterance(self._finals.popleft())
+            if len(self.buffer) == 0:
                 return
-            # Run transcription on wav bytes
-            res = self.model.generate(input=wav_bytes)
-            # assemble text from segments
-            self.full_text = res[0]['text'].replace(' ', '')
-            self.emit_cb(self)
+            if self.dump_path:
+                with open(self.dump_path, 'wb') as f:
+                    f.write(self.buffer.get_wav_bytes())
+            # Snapshot the window on the event loop thread, capture can't touch it until the next call.
+            # Transcription runs directly on the float32 PCM, no WAV encode/decode round trip
+            samples = self.buffer.get_float32()
+            window_start = self.buffer.start_sample
+            epoch = self._epoch
+            res = await self._run_step(self.backend.transcribe_pcm, samples)
+            if epoch != self._epoch:
+                return # the utterance was committed while this step was decoding
+            self._handle_hypothesis(res, window_start, len(samples))
+
+    def _handle_hypothesis(self, res: dict, window_start: int, window_samples: int):
+        text, times = parse_hypothesis(res)
+        stable = self.agreement.update(text)
+        delta = ""
+        if len(stable) > self._window_committed:
+            delta = stable[self._window_committed:]
+            self._window_committed = len(stable)
+            cut = commit_cut_ms(times, len(stable))
+            if cut is None:
+                # no timestamps (FireRed, ...): assume the chars are spread evenly over the window's speech
+                cut = estimate_cut_ms(len(stable), len(text), window_samples * 1000 // self.sample_rate)
+            if cut is not None:
+                # the committed audio doesn't need to be decoded again, later hypotheses start after it
+                self.buffer.consume_until(window_start + cut * self.sample_rate // 1000)
+                self.agreement.reset()
+                self._window_committed = 0
+            text = text[len(stable):]
+        else:
+            text = text[self._window_committed:]
+        self._emit(delta, text)
+
+
+class IncrementalStreamingASR(StreamingASR):
+    """
+    Streaming decode through backend.transcribe_stream (paraformer-zh-streaming natively): each step only
+    processes the new 600ms chunk and carries the encoder/decoder state in `cache`, so compute per second
+    of audio is constant instead of growing with CONTEXT_SECONDS. commit_utterance() flushes the utterance with is_final.
+    """
+    def __init__(self, *args,
+                 chunk_size: list = STREAMING_CHUNK_SIZE,
+                 encoder_chunk_look_back: int = ENCODER_CHUNK_LOOK_BACK,
+                 decoder_chunk_look_back: int = DECODER_CHUNK_LOOK_BACK,
+                 **kwargs):
+        super().__init__(*args, **kwargs)
+        self.chunk_size = chunk_size
+        self.encoder_chunk_look_back = encoder_chunk_look_back
+        self.decoder_chunk_look_back = decoder_chunk_look_back
+        self.chunk_stride = chunk_size[1] * 960 # 600ms at 16kHz
+
+        self._cache = {}
+        self._partial = np.zeros((0,), dtype=np.int16) # audio that doesn't fill a whole chunk yet
+        self._chunks = deque() # (float32 chunk, is_final) waiting to be decoded
+        self._utterance_samples = 0
+
+    def feed(self, pcm16: np.ndarray):
+        self.buffer.append(pcm16)
+        self._utterance_samples += len(pcm16)
+        self._partial = np.concatenate((self._partial, pcm16))
+        while len(self._partial) >= self.chunk_stride:
+            self._push_chunk(self._partial[:self.chunk_stride], False)
+            self._partial = self._partial[self.chunk_stride:]
+        if self._chunks:
+            self.request_infer()
+
+    def _push_chunk(self, pcm16: np.ndarray, is_final: bool):
+        self._chunks.append((pcm16.astype(np.float32) / 32768, is_final))
 
+    def commit_utterance(self):
+        if self._utterance_samples == 0:
+            return
+        # the model needs some input to flush on, pad with a frame of silence if the last chunk was exact
+        tail = self._partial if len(self._partial) else np.zeros((960,), dtype=np.int16)
+        self._push_chunk(tail, True)
+        self._partial = np.zeros((0,), dtype=np.int16)
+        self._utterance_samples = 0
+        self.buffer.clear()
+        self.request_infer()
 
-def emit_print(asr: StreamingASR):
-    print(f"[EMIT] '{asr.full_text}'")
+    def _generate_chunk(self, chunk: np.ndarray, is_final: bool):
+        return self.backend.transcribe_stream(chunk, self._cache, is_final,
+                                              chunk_size=self.chunk_size,
+                                              encoder_chunk_look_back=self.encoder_chunk_look_back,
+                                              decoder_chunk_look_back=self.decoder_chunk_look_back)
+
+    async def infer_once(self):
+        async with self._lock:
+            while self._chunks:
+                chunk, is_final = self._chunks.popleft()
+                text = await self._run_step(self._generate_chunk, chunk, is_final)
+                # streaming output never gets revised, so it is committed right away
+                self._emit(text, "")
+                if is_final:
+                    self._cache = {}
+                    if self.committed_text:
+                        self.text_outputs.append(self.committed_text)
+                        self.committed_text = ""
+
+
+def emit_print(asr: StreamingASR, committed: str, tentative: str):
+    print(f"[EMIT] +'{committed}' ~'{tentative}'")
     print(f"[OUTPUTS] {asr.text_outputs} + {asr.full_text}")
     print(f"[CONCAT_OUTPUTS] '{' '.join(asr.text_outputs) + ' ' +  asr.full_text}'")
 
 
 # Example usage: simulate incoming audio chunks (e.g., produced by microphone callback)
-async def simulate_microphone_stream(asr: StreamingASR):
-    """
-    This simulates incoming audio frames: instead of a real mic, it reads chunks from a WAV file.
-    Replace this with actual microphone capture (sounddevice or pyaudio) in production.
-    """
+# replace with path to a test long wav file sampled at SAMPLE_RATE
+TEST_WAV = "asset/sample4_zh.ogg"
+
+def read_audio_int16(path: str) -> np.ndarray:
+    """Read an audio file as mono int16 PCM at SAMPLE_RATE."""
     import soundfile as sf
-    # replace with path to a test long wav file sampled at SAMPLE_RATE
-    TEST_WAV = "asset/sample4_zh.ogg"
-    data, sr = sf.read(TEST_WAV, dtype="int16")
+    from pydub import AudioSegment
+    data, sr = sf.read(path, dtype="int16")
+    raw = data if data.ndim == 1 else data[:, 0]
     if sr != SAMPLE_RATE:
         # resample using pydub
-        audio = AudioSegment(data.tobytes(), frame_rate=sr, sample_width=2, channels=1)
+        audio = AudioSegment(raw.tobytes(), frame_rate=sr, sample_width=2, channels=1)
         audio = audio.set_frame_rate(SAMPLE_RATE).set_channels(1)
         raw = np.frombuffer(audio.raw_data, dtype=np.int16)
-    else:
-        raw = data if data.ndim == 1 else data[:, 0]
-    chunk_samples = int(STEP_SECONDS * SAMPLE_RATE)
+    return raw
+
+
+async def simulate_microphone_stream(asr: StreamingASR,
+                                     wav_path: str = TEST_WAV,
+                                     speed: float = 1.25,
+                                     vad_threshold: float = VAD_THRESHOLD):
+    """
+    This simulates incoming audio frames: instead of a real mic, it reads chunks from a WAV file.
+    Replace this with actual microphone capture (sounddevice or pyaudio) in production.
+    `speed` is how much faster than real time chunks arrive (0 = as fast as possible).
+    """
+    raw = read_audio_int16(wav_path)
+    vad = StreamingVAD(asr.vad_model, sample_rate=asr.sample_rate, threshold=vad_threshold)
+    chunk_samples = int(asr.step_seconds * asr.sample_rate)
     idx = 0
     while idx < len(raw):
-        # TODO: stop inferring
         chunk = raw[idx: idx + chunk_samples]
         idx += chunk_samples
-        asr.buffer.append(chunk.astype(np.int16))
-        # we can call infer immediately or rely on periodic loop
-        await asr.infer_once()
-        await asyncio.sleep(STEP_SECONDS * 0.8)  # simulate realtime arrival
+        dispatch_vad_events(asr, vad.process(chunk.astype(np.float32) / 32768))
+        # simulate realtime arrival
+        await asyncio.sleep(asr.step_seconds / speed if speed > 0 else 0)
+    asr.commit_utterance()
+    await asr.drain()
 
 
 async def system_audio_stream(asr: StreamingASR):
+    import soundcard as sc
     loopback_name = 'Monitor of Starship/Matisse HD Audio Controller Analog Stereo'
     speaker = sc.get_microphone(loopback_name, include_loopback=True)        
     volume_gain = 42.0 # the audio coming from the loopback device is unusually quiet we need it amplified for the vad
     if speaker:
         with speaker.recorder(samplerate=asr.sample_rate, channels=1) as mic:
             print("LISTENING...")
+            vad = StreamingVAD(asr.vad_model, sample_rate=asr.sample_rate)
+            loop = asyncio.get_running_loop()
             while True:
-                block = (mic.record(numframes = CHUNK_SIZE) * volume_gain).flatten()
-                #speech_detected = len(get_speech_timestamps(block, asr.vad_model, sampling_rate=asr.sample_rate))
-                THRESHOLD = 0.98
-                speech_detected = bool(asr.vad_model.audio_forward(torch.from_numpy(block).float(), sr=SAMPLE_RATE).abs().max() > THRESHOLD)
-                if not speech_detected:
-                    asr.buffer.clear() # this will cause inference issues for smaller STEP_SECONDS values because small pauses in sentences will trigger a loss of context
-                    # clearing the cache only makes sense if the vad only cuts out silences longer than like 1 or 2 seconds
-                    # but if we don't clear the cache then we can't detect sentence boundaries properly
-                    if asr.full_text:
-                        asr.text_outputs.append(asr.full_text)
-                        asr.full_text = ""
-                    continue # don't add to the buffer if the entire second long chunk is just silence
-                asr.buffer.append(pcm_float_to_int16(block))
-                await asr.infer_once()
+                # record on the default executor so inference results can be handled while we wait for audio
+                block = (await loop.run_in_executor(None, mic.record, CHUNK_SIZE) * volume_gain).flatten()
+                # the VAD works on 512-sample frames and only forwards speech, so short pauses keep their context
+                # and the utterance is committed once silence lasts VAD_MIN_SILENCE_MS
+                dispatch_vad_events(asr, vad.process(block))
                 #print(block.shape, block.dtype)
 
 
 async def main():
     rb = RollingBuffer(CONTEXT_SECONDS, SAMPLE_RATE)
-    asr = StreamingASR(model=model, buffer=rb, step_seconds=STEP_SECONDS, emit_callback=emit_print)
+    if INCREMENTAL:
+        backend = get_backend("paraformer-streaming")
+        asr = IncrementalStreamingASR(backend=backend, buffer=rb, step_seconds=STEP_SECONDS, emit_callback=emit_print)
+    else:
+        backend = get_backend(ASR_BACKEND)
+        asr = StreamingASR(backend=backend, buffer=rb, step_seconds=STEP_SECONDS, emit_callback=emit_print)
     await system_audio_stream(asr)
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    import argparse
+    parser = argparse.ArgumentParser()
+    subparsers = parser.add_subparsers(dest="command")
+    batch_parser = subparsers.add_parser("transcribe-batch", help="transcribe recorded audio files in batches")
+    batch_parser.add_argument("paths", nargs="+", help="audio files or directories")
+    batch_parser.add_argument("--out-dir", default="transcripts")
+    batch_parser.add_argument("--batch-size", type=int, default=16)
+    batch_parser.add_argument("--backend", default=ASR_BACKEND)
+    args = parser.parse_args()
+
+    if args.command == "transcribe-batch":
+        from utils.batch_asr import transcribe_batch
+        transcribe_batch(args.paths, get_backend(args.backend), out_dir=args.out_dir, batch_size=args.batch_size)
+    else:
+        asyncio.run(main())
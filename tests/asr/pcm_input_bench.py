@@ -0,0 +1,48 @@
+"""
+Per-step inference latency when the window is fed to paraformer as WAV bytes (encode + decode round trip)
+versus the float32 PCM view from RollingBuffer.get_float32().
+Run from the repo root: python tests/asr/pcm_input_bench.py
+"""
+import sys
+sys.path.append(".")
+
+import time
+import numpy as np
+import soundfile as sf
+import librosa
+from super_asr import RollingBuffer, SAMPLE_RATE, CONTEXT_SECONDS, STEP_SECONDS
+from utils.asr_backends import get_backend
+
+model = get_backend("paraformer").model
+
+wav_file = "assets/sample1_zh.ogg"
+speech, sample_rate = sf.read(wav_file, dtype="float32")
+if speech.ndim > 1:
+    speech = speech[:, 0]
+if sample_rate != SAMPLE_RATE:
+    speech = librosa.resample(speech, orig_sr=sample_rate, target_sr=SAMPLE_RATE)
+pcm16 = (np.clip(speech, -1.0, 1.0) * 32767).astype(np.int16)
+
+
+def run(use_wav):
+    rb = RollingBuffer(CONTEXT_SECONDS, SAMPLE_RATE)
+    chunk_samples = int(STEP_SECONDS * SAMPLE_RATE)
+    prep, total = [], []
+    for idx in range(0, len(pcm16), chunk_samples):
+        rb.append(pcm16[idx: idx + chunk_samples])
+        start = time.perf_counter()
+        inp = rb.get_wav_bytes() if use_wav else rb.get_float32()
+        prepared = time.perf_counter()
+        model.generate(input=inp)
+        end = time.perf_counter()
+        prep.append(prepared - start)
+        total.append(end - start)
+    return np.array(prep) * 1000, np.array(total) * 1000
+
+
+if __name__ == "__main__":
+    run(False) # warm up
+
+    for name, use_wav in [("wav bytes", True), ("float32 view", False)]:
+        prep, total = run(use_wav)
+        print(f"{name:>12}: input prep {prep.mean():.2f} ms | step p50 {np.percentile(total, 50):.1f} ms | step p90 {np.percentile(total, 90):.1f} ms")
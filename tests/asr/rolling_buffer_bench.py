@@ -0,0 +1,37 @@
+"""
+Compares the concatenate-and-slice RollingBuffer against the preallocated ring buffer.
+"window" is what the buffer itself costs per step: append plus getting the contiguous window.
+"float32" adds the get_float32() conversion inference does, which reads the whole window in both modes.
+Run from the repo root: python tests/asr/rolling_buffer_bench.py
+"""
+import sys
+sys.path.append(".")
+
+import time
+import numpy as np
+from super_asr import RollingBuffer, SAMPLE_RATE, CONTEXT_SECONDS
+
+STREAM_SECONDS = 600 # ten minutes of simulated capture per run
+STEP_SIZES = [0.1, 0.25, 1.0]
+
+
+def run(ring, step_seconds, read):
+    rb = RollingBuffer(CONTEXT_SECONDS, SAMPLE_RATE, ring=ring)
+    chunk = (np.random.default_rng(0).standard_normal(int(step_seconds * SAMPLE_RATE)) * 3000).astype(np.int16)
+    steps = int(STREAM_SECONDS / step_seconds)
+
+    start = time.perf_counter()
+    for _ in range(steps):
+        rb.append(chunk)
+        # inference reads the contiguous window every step
+        rb.get_float32() if read == "float32" else rb.buffer
+    return (time.perf_counter() - start) / steps
+
+
+if __name__ == "__main__":
+    print(f"{'read':>7} | {'step':>6} | {'concat step (us)':>20} | {'ring step (us)':>18} | {'speedup':>7}")
+    for read in ("window", "float32"):
+        for step in STEP_SIZES:
+            concat = run(False, step, read)
+            ring = run(True, step, read)
+            print(f"{read:>7} | {step:>5.2f}s | {concat * 1e6:>20.1f} | {ring * 1e6:>18.1f} | {concat / ring:>6.1f}x")
@@ -0,0 +1,95 @@
+"""
+group_lines of utils/language_processor.py against the previous pairwise implementation (kept
+below as reference_group_lines), on synthetic pages of 10, 100 and 1000 OCR lines: text chopped
+into 6-16 character lines, like a page of wrapped text. Checks both give the same groups.
+Caches (segmentation, simhash) are emptied before every timed run, except for the "warm" column.
+Run from the repo root: python tests/nlp/group_lines_bench.py
+"""
+import sys
+sys.path.append(".")
+
+import time
+import jieba
+import numpy as np
+from simhash import Simhash
+import utils.language_processor as lang
+from segment_cache_bench import LINES
+
+PAGES = [10, 100, 1000]
+REPEATS = 3
+
+
+def reference_continuation_score(L1, L2):
+    def word_split_score(line1, line2):
+        if not line1 or not line2: return 0
+        window = line1[-3:] + line2[:3]
+        score = 0.0
+        for w in jieba.cut(window):
+            if len(w) >= 2 and w in window and w not in line1 and w not in line2:
+                score += 1.0
+        return min(score, 1.0)
+
+    def semantic_similarity(line1, line2):
+        if not line1 or not line2: return 0.0
+        return 1 - bin(Simhash(line1).value ^ Simhash(line2).value).count("1") / 64
+
+    def paragraph_start_signal(line):
+        return 1.0 if any(line.startswith(c) for c in lang.PARA_START_CUES) else 0.0
+
+    return (0.5 * lang.punctuation_score(L1) + 0.7 * word_split_score(L1, L2) +
+            0.4 * semantic_similarity(L1, L2) - 1.0 * paragraph_start_signal(L2))
+
+
+def reference_group_lines(data, threshold=0.2):
+    lines, boxes = data['texts'], data['boxes']
+    groups, group_boxes = [], []
+    current, current_box = lines[0], boxes[0]
+    for i in range(len(lines) - 1):
+        if reference_continuation_score(lines[i], lines[i+1]) >= threshold:
+            current += lines[i+1]
+            current_box = lang.bounding_box(boxes[i], boxes[i+1])
+        else:
+            groups.append(current)
+            group_boxes.append(current_box)
+            current, current_box = lines[i+1], boxes[i+1]
+    groups.append(current)
+    group_boxes.append(current_box)
+    return {'texts': groups, 'boxes': group_boxes}
+
+
+def make_page(n, rng):
+    text = "".join(rng.choice(LINES, size=n * 2))
+    lines, pos = [], 0
+    while len(lines) < n:
+        width = int(rng.integers(6, 17))
+        lines.append(text[pos:pos + width])
+        pos += width
+    boxes = [[10, 30 * i, 10 + 20 * len(l), 30 * i + 24] for i, l in enumerate(lines)]
+    return {'texts': lines, 'boxes': boxes}
+
+
+def timed(group, page, cold=True):
+    times = []
+    for _ in range(REPEATS):
+        if cold:
+            lang.segment_cache.clear()
+            lang.line_simhash.cache_clear()
+            lang.straddling_word.cache_clear()
+        start = time.perf_counter()
+        res = group(page)
+        times.append(time.perf_counter() - start)
+    return res, np.median(times) * 1000
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    jieba.initialize()
+    lang.load_boundary_index() # built once per process, not part of grouping a page
+    for n in PAGES:
+        page = make_page(n, rng)
+        ref, ref_ms = timed(reference_group_lines, page)
+        new, new_ms = timed(lang.group_lines, page)
+        _, warm_ms = timed(lang.group_lines, page, cold=False) # same page again, like a static screen
+        print(f"{n:5d} lines | before {ref_ms:8.2f} ms | now {new_ms:8.2f} ms | {ref_ms / new_ms:4.1f}x "
+              f"| warm caches {warm_ms:7.2f} ms "
+              f"| {len(new['texts'])} groups | same: {new == ref}")
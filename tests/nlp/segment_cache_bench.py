@@ -0,0 +1,71 @@
+"""
+Segmentation of a repetitive OCR/ASR-like stream through batch_split_to_words, with the
+segmentation cache of utils/language_processor.py emptied before every batch (= no cache) and kept.
+The stream is FRAMES batches of 1-6 lines drawn from LINES with a skewed distribution, a few lines
+(UI labels, a subtitle on screen) come back all the time, most only now and then.
+Run from the repo root: python tests/nlp/segment_cache_bench.py [--db lines.db]
+"""
+import sys
+sys.path.append(".")
+
+import time
+import argparse
+import numpy as np
+import utils.language_processor as lang
+
+FRAMES = 300
+LINES = [
+    "北京大学的学生在人工智能领域取得了显著的成果。", "离开佩纳科尼后，他们的下一站是安弗勒斯。",
+    "开始游戏", "设置", "退出", "继续", "任务目标：前往城镇中心", "你确定要放弃当前进度吗？",
+    "这是一个问题，我们必须解决。", "首先，我们需要了解情况。", "然而事情并没有那么简单。",
+    "他说明天会下雨，所以我们带了伞。", "请按任意键继续", "正在加载，请稍候……", "获得物品：古老的钥匙",
+    "我已经等你很久了。", "为什么你现在才来？", "路上遇到了一些麻烦。", "没关系，我们走吧。",
+    "总之，这次旅行非常愉快。", "对于这个结果，大家都很满意。", "此外，我们还参观了博物馆。",
+    "今天的天气很好，适合出去散步。", "他们在公园里聊了很久。", "这本书我已经看了三遍了。",
+    "火车将在十分钟后到达。", "请注意安全，不要靠近站台边缘。", "欢迎回来，旅行者。",
+    "你的背包已满。", "存档成功",
+]
+
+
+def make_stream():
+    rng = np.random.default_rng(0)
+    p = 1 / np.arange(1, len(LINES) + 1) ** 1.2
+    p /= p.sum()
+    return [list(rng.choice(LINES, size=rng.integers(1, 7), p=p)) for _ in range(FRAMES)]
+
+
+def run(name, stream, cached):
+    lang.segment_cache.clear()
+    results = []
+    start = time.perf_counter()
+    for batch in stream:
+        if not cached: lang.segment_cache.clear()
+        results.append(lang.batch_split_to_words(batch))
+    elapsed = time.perf_counter() - start
+    stats = lang.segment_cache.stats()
+    line = f"{name:>8} | {elapsed / len(stream) * 1000:7.2f} ms/batch"
+    if cached:
+        line += f" | hit rate {stats['hit_rate']:.0%} ({stats['disk_hits']} from disk) | saved ~{stats['saved_ms']:.0f} ms"
+    print(line)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db", help="also run with a SQLite backed cache, restarted on the same file")
+    args = parser.parse_args()
+
+    if not lang.tagger.wait():
+        sys.exit(f"HanLP unavailable: {lang.tagger.error}")
+    stream = make_stream()
+    lang.batch_split_to_words(LINES[:4]) # warmup
+    print(f"{FRAMES} batches, {sum(map(len, stream))} lines, {len({l for b in stream for l in b})} distinct")
+
+    reference = run("no cache", stream, cached=False)
+    same = run("cache", stream, cached=True) == reference
+    if args.db:
+        lang.use_segment_cache(db_path=args.db)
+        run("sqlite", stream, cached=True)
+        lang.use_segment_cache(db_path=args.db) # restart: empty LRU, filled database
+        same &= run("restart", stream, cached=True) == reference
+    print("same results as without cache:", same)
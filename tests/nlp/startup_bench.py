@@ -0,0 +1,64 @@
+"""
+Start-up cost of utils/language_processor.py, each case in a fresh interpreter:
+    eager  - import hanlp and load the MTL model up front, like the module used to at import
+    lazy   - import the module, warm up in the background and segment right away (jieba stand-in),
+             then wait for HanLP and segment again
+Reports import time, time to the first segmented result and time until HanLP results.
+Run from the repo root: python tests/nlp/startup_bench.py [--device -1]
+"""
+import sys
+import json
+import argparse
+import subprocess
+
+SENTENCES = ["这是一个问题，我们必须解决。", "首先，我们需要了解情况。"]
+
+EAGER = """
+import time, json
+start = time.perf_counter()
+import hanlp
+from utils.language_processor import HANLP_MODEL
+imported = time.perf_counter()
+tagger = hanlp.load(getattr(hanlp.pretrained.mtl, HANLP_MODEL), device=DEVICE)
+res = tagger(SENTENCES, tasks=['tok/fine', 'pos/ctb'])
+first = time.perf_counter()
+print(json.dumps({'import': imported - start, 'first_result': first - start, 'hanlp_result': first - start}))
+"""
+
+LAZY = """
+import time, json
+start = time.perf_counter()
+import utils.language_processor as lang
+imported = time.perf_counter()
+if DEVICE is not None: lang.tagger.device = DEVICE
+lang.tagger.warmup()
+lang.batch_split_to_words(SENTENCES) # jieba while HanLP loads
+first = time.perf_counter()
+lang.tagger.wait()
+res = lang.batch_split_to_words(SENTENCES)
+print(json.dumps({'import': imported - start, 'first_result': first - start,
+                  'hanlp_result': time.perf_counter() - start, 'ready': lang.tagger.ready}))
+"""
+
+
+def run(code, device):
+    script = f"import sys\nsys.path.append('.')\nSENTENCES = {SENTENCES!r}\nDEVICE = {device!r}\n" + code
+    out = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True)
+    lines = [l for l in out.stdout.splitlines() if l.startswith("{")]
+    if not lines:
+        print(out.stdout, out.stderr)
+        return None
+    return json.loads(lines[-1])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--device", type=int, help="HanLP device, default GPU 0 if available else CPU")
+    args = parser.parse_args()
+
+    for name, code in (("eager", EAGER), ("lazy", LAZY)):
+        # the eager case always needs an explicit device, as the old module passed device=0
+        t = run(code, args.device if args.device is not None or name == "lazy" else 0)
+        if t:
+            print(f"{name:>5} | import {t['import']:6.2f} s | first result {t['first_result']:6.2f} s "
+                  f"| HanLP result {t['hanlp_result']:6.2f} s" + ("" if t.get('ready', True) else " (HanLP unavailable)"))
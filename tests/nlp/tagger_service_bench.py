@@ -0,0 +1,69 @@
+"""
+Throughput versus latency of HanLP tagging through the micro-batching TaggerService
+(utils/tagger_service.py) at several batch windows, against every caller calling the tagger itself
+(one at a time, the model isn't shared between threads). CLIENTS threads each tag REQUESTS
+sentences one after the other, like ASR streams and OCR clients emitting lines.
+Run from the repo root: python tests/nlp/tagger_service_bench.py [--clients 8] [--windows 0 2 5 10 20]
+"""
+import sys
+sys.path.append(".")
+
+import time
+import argparse
+import threading
+import numpy as np
+import utils.language_processor as lang
+from utils.tagger_service import TaggerService
+from segment_cache_bench import LINES
+
+REQUESTS = 20
+
+
+def run_clients(clients, tag):
+    latencies = [[] for _ in range(clients)]
+
+    def client(i):
+        rng = np.random.default_rng(i)
+        for _ in range(REQUESTS):
+            text = str(rng.choice(LINES))
+            start = time.perf_counter()
+            tag(text)
+            latencies[i].append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    start = time.perf_counter()
+    for t in threads: t.start()
+    for t in threads: t.join()
+    elapsed = time.perf_counter() - start
+    lat = np.concatenate(latencies) * 1000
+    return clients * REQUESTS / elapsed, np.percentile(lat, 50), np.percentile(lat, 99)
+
+
+def report(name, result, stats=None):
+    fps, p50, p99 = result
+    line = f"{name:>10} | {fps:7.1f} sentences/s | p50 {p50:7.1f} ms | p99 {p99:7.1f} ms"
+    if stats: line += f" | mean batch {stats['mean_batch']:4.1f} | padding {stats['padding_waste']:.0%}"
+    print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--windows", type=float, nargs="+", default=[0, 2, 5, 10, 20])
+    args = parser.parse_args()
+
+    if not lang.tagger.wait():
+        sys.exit(f"HanLP unavailable: {lang.tagger.error}")
+    lang.tagger(LINES[:4], tasks=['tok/fine', 'pos/ctb']) # warmup
+    print(f"{args.clients} clients x {REQUESTS} sentences")
+
+    lock = threading.Lock()
+    def direct(text):
+        with lock: return lang.tagger([text], tasks=['tok/fine', 'pos/ctb'])
+    report("direct", run_clients(args.clients, direct))
+
+    for window in args.windows:
+        service = TaggerService(lang.tagger, window_ms=window).start()
+        result = run_clients(args.clients, lambda text: service.submit([text]).result())
+        service.close()
+        report(f"{window:g} ms", result, service.stats())
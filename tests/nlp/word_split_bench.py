@@ -0,0 +1,79 @@
+"""
+Regression check and timing of word_split_score (utils/language_processor.py, jieba dictionary
+lookup index, jieba only where its HMM decides) against the previous version that cut the whole
+window with jieba (reference_word_split_score below). The corpus is every sentence below cut at
+every position into a line pair, like text wrapped at any width. Both must give the same score on
+every pair. Also reports how many windows still needed jieba.
+Run from the repo root: python tests/nlp/word_split_bench.py [-v]
+"""
+import sys
+sys.path.append(".")
+
+import time
+import jieba
+import utils.language_processor as lang
+from segment_cache_bench import LINES
+
+SENTENCES = LINES + [
+    "滚开，废物！你活该！", "总结来说，未来的发展仍然不确定。", "此外，我们还需要考虑相关政策的变动。",
+    "这个问题非常复杂，我们必须认真考虑。", "我看到那个骑自行车的小女孩了。", "只是雨滴有什么麻烦的。这还没有打雷呢",
+    "你做出了多么明智的决定啊！我为你感到骄傲。", "酒楼丧尽天良，开始借机竞拍房间，哎，一群蠢货。",
+    "相劝都无法劝退一心向死的玲子，无计可施的它只能编造谎言，好让玲子活下去。",
+    "简介：与世无争只想过平静生活的食草龙，遇上了中二少女玲子。",
+    "大家好，我是食草龙的导演。第二季终于顺利更新！这次终于实现了中日同播。",
+    "第二季会聚焦于玲子和食草龙在亚斯嘉王国的一系列故事，剧情会更加紧凑和精彩。",
+    "收到好友从远方寄来的生日礼物，那份意外的惊喜与深深的祝福让我心中充满了甜蜜的快乐，笑容如花儿般绽放。",
+    "无须行礼，此身虽然尊贵殊胜，不过此般前来，是想要做些微服游历民间的事。我看上了你的身手，现在你就是我的御侧保镖了。",
+    # OCR lines also carry latin, digits and line breaks, jieba segments those differently
+    "版本3.10发布了，支持Python和C++开发。", "打开settings.json文件，把timeout改成30%。", "第1章\r\n序幕\n开始",
+]
+REPEATS = 20
+LINE_CHARS = 12
+
+
+def reference_word_split_score(line1, line2):
+    if not line1 or not line2: return 0
+    window = line1[-3:] + line2[:3]
+    score = 0.0
+    for w in jieba.cut(window):
+        if len(w) >= 2 and w in window and w not in line1 and w not in line2:
+            score += 1.0
+    return min(score, 1.0)
+
+
+def timed(score, pairs):
+    elapsed = 0.0
+    for _ in range(REPEATS):
+        lang.straddling_word.cache_clear() # cold, every window is seen once per repeat
+        start = time.perf_counter()
+        for l1, l2 in pairs:
+            score(l1, l2)
+        elapsed += time.perf_counter() - start
+    return elapsed / (REPEATS * len(pairs)) * 1e6
+
+
+if __name__ == "__main__":
+    pairs = [(s[:k][-LINE_CHARS:], s[k:][:LINE_CHARS]) for s in SENTENCES for k in range(1, len(s))]
+    jieba.initialize()
+    start = time.perf_counter()
+    lang.load_boundary_index()
+    print(f"index built in {time.perf_counter() - start:.2f} s, {len(pairs)} line pairs")
+
+    differ = [(l1, l2) for l1, l2 in pairs if lang.word_split_score(l1, l2) != reference_word_split_score(l1, l2)]
+    split = sum(reference_word_split_score(l1, l2) for l1, l2 in pairs)
+    print(f"{int(split)} pairs with a split word | differences from jieba: {len(differ)} | same: {not differ}")
+    if "-v" in sys.argv:
+        for l1, l2 in differ:
+            print(f"  {l1} | {l2}  jieba {reference_word_split_score(l1, l2)} {list(jieba.cut(l1[-3:] + l2[:3]))}")
+
+    fallbacks = []
+    jieba_word = lang.jieba_straddling_word
+    lang.jieba_straddling_word = lambda tail, head: fallbacks.append(tail + head) or jieba_word(tail, head)
+    lang.straddling_word.cache_clear()
+    for l1, l2 in pairs: lang.word_split_score(l1, l2)
+    lang.jieba_straddling_word = jieba_word
+    print(f"jieba ran on {len(set(fallbacks))} of {lang.straddling_word.cache_info().currsize} windows")
+
+    before = timed(reference_word_split_score, pairs)
+    now = timed(lang.word_split_score, pairs)
+    print(f"jieba {before:6.2f} us/pair | index {now:6.2f} us/pair | {before / now:4.1f}x")
@@ -0,0 +1,77 @@
+"""
+CPU OCR on the images in assets/images: stock PaddleOCR on the CPU versus the cpu and onnx
+profiles of utils/ocr_engine.py (thread count, batched recognition, text height downscaling).
+Each image is OCR'd REPEATS times after a warmup, "same" is the share of stock lines found verbatim.
+Run from the repo root:
+    python tests/ocr/cpu_ocr_bench.py [--threads 8] [--text-height 32] [--det-model ... --rec-model ...]
+The onnx profile is skipped when its models aren't there (see ONNX_DET_MODEL / ONNX_REC_MODEL).
+"""
+import sys
+sys.path.append(".")
+
+import os
+import glob
+import time
+import argparse
+import numpy as np
+from PIL import Image
+from utils import ocr_engine
+
+REPEATS = 5
+
+
+class StockPaddle:
+    """PaddleOCR on the CPU with its default settings, as a baseline."""
+    def __init__(self):
+        from paddleocr import PaddleOCR
+        self.ocr = PaddleOCR(
+            use_doc_orientation_classify=False,
+            use_doc_unwarping=False,
+            use_textline_orientation=False,
+            ocr_version="PP-OCRv4",
+            device="cpu",
+        )
+
+    def predict(self, frame):
+        return self.ocr.predict(frame)
+
+
+def run(name, engine, images, reference=None):
+    texts, times = {}, []
+    for path, img in images.items():
+        res = engine.predict(img) # warmup, and lets text_height see the line height
+        start = time.perf_counter()
+        for _ in range(REPEATS):
+            res = engine.predict(img)
+        times.append((time.perf_counter() - start) / REPEATS)
+        texts[path] = list(res[0]['rec_texts'])
+
+    line = f"{name:>6} | mean {np.mean(times) * 1000:8.1f} ms/image | max {np.max(times) * 1000:8.1f} ms"
+    if reference:
+        found = sum(len(set(reference[p]) & set(texts[p])) for p in images)
+        total = sum(len(reference[p]) for p in images)
+        line += f" | same {found / max(total, 1):.0%}"
+    print(line)
+    return texts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=os.cpu_count())
+    parser.add_argument("--text-height", type=int)
+    parser.add_argument("--det-model", default=ocr_engine.ONNX_DET_MODEL)
+    parser.add_argument("--rec-model", default=ocr_engine.ONNX_REC_MODEL)
+    parser.add_argument("--rec-dict")
+    args = parser.parse_args()
+
+    images = {p: np.asarray(Image.open(p).convert("RGB")) for p in sorted(glob.glob("assets/images/*"))}
+    print(f"{len(images)} images, {args.threads} threads, text height {args.text_height}")
+
+    reference = run("stock", StockPaddle(), images)
+    run("cpu", ocr_engine.create_engine("cpu", threads=args.threads, text_height=args.text_height), images, reference)
+    if os.path.exists(args.det_model) and os.path.exists(args.rec_model):
+        onnx = ocr_engine.create_engine("onnx", threads=args.threads, text_height=args.text_height,
+                                        det_model=args.det_model, rec_model=args.rec_model, rec_dict=args.rec_dict)
+        run("onnx", onnx, images, reference)
+    else:
+        print("onnx | skipped, no exported models at", args.det_model)
@@ -0,0 +1,82 @@
+"""
+Replays a frame sequence through the pre-OCR change detector (utils/frame_change.py) and reports
+how many frames would be skipped and what the detector costs per frame.
+Frames come from a directory of .npy/.png/.jpg files in name order, eg. recorded with
+RECORD_DIR in ocr_server.py. Without one, a sequence is made from assets/images: every screenshot
+is held for HOLD frames with a bit of noise, like a subtitle that stays on screen in a video.
+Run from the repo root:
+    python tests/ocr/frame_change_bench.py [frames_dir] [--threshold 8] [--ocr]
+With --ocr every frame also goes through ocr_server.run_ocr, with and without the detector.
+"""
+import sys
+sys.path.append(".")
+
+import os
+import glob
+import time
+import argparse
+import numpy as np
+from PIL import Image
+from utils.frame_change import FrameChangeDetector
+
+HOLD = 20 # frames each screenshot stays on screen in the synthetic sequence
+NOISE = 3 # +- pixel noise, roughly what video compression adds between identical frames
+CROP_HEIGHT = 360
+
+
+def load_frames(frames_dir):
+    frames = []
+    for path in sorted(glob.glob(os.path.join(frames_dir, "*"))):
+        if path.endswith(".npy"):
+            frames.append(np.load(path))
+        elif path.lower().endswith((".png", ".jpg", ".jpeg")):
+            frames.append(np.asarray(Image.open(path).convert("RGB")))
+    return frames
+
+
+def synthetic_frames():
+    rng = np.random.default_rng(0)
+    frames = []
+    for path in sorted(glob.glob("assets/images/screenshot_*")):
+        img = np.asarray(Image.open(path).convert("RGB").resize((1920, 1080)))[-CROP_HEIGHT:]
+        for _ in range(HOLD):
+            noise = rng.integers(-NOISE, NOISE + 1, img.shape, dtype=np.int16)
+            frames.append(np.clip(img + noise, 0, 255).astype(np.uint8))
+    return frames
+
+
+def replay_detector(frames, threshold):
+    detector = FrameChangeDetector(threshold)
+    start = time.perf_counter()
+    for frame in frames:
+        detector.changed(frame)
+    elapsed = time.perf_counter() - start
+    stats = detector.stats()
+    print(f"detector | threshold {threshold} | {len(frames)} frames | processed {stats['processed']} "
+          f"| skipped {stats['skipped']} ({stats['skip_rate']:.0%}) | {elapsed / len(frames) * 1000:.2f} ms/frame")
+
+
+def replay_ocr(frames, threshold):
+    import ocr_server
+    ocr_server.load_ocr()
+    for name, value in (("no detector", -1.0), ("detector", threshold)):
+        ocr_server.CHANGE_THRESHOLD = value # < 0: every frame counts as changed
+        session = ocr_server.OcrSession()
+        start = time.perf_counter()
+        for frame in frames:
+            ocr_server.run_ocr(frame, session)
+        elapsed = time.perf_counter() - start
+        print(f"{name:>11} | {elapsed:7.2f} s | {elapsed / len(frames) * 1000:7.1f} ms/frame | {session.stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("frames_dir", nargs="?")
+    parser.add_argument("--threshold", type=float, default=8.0)
+    parser.add_argument("--ocr", action="store_true")
+    args = parser.parse_args()
+
+    frames = load_frames(args.frames_dir) if args.frames_dir else synthetic_frames()
+    replay_detector(frames, args.threshold)
+    if args.ocr:
+        replay_ocr(frames, args.threshold)
@@ -0,0 +1,52 @@
+"""
+Steady-state latency of full OCR (ocr.predict) versus IncrementalOcr on a static overlay where one
+line changes every frame: a screenshot with a counter line drawn over it.
+Run from the repo root: python tests/ocr/incremental_ocr_bench.py
+"""
+import sys
+sys.path.append(".")
+
+import time
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+import ocr_server
+from utils.incremental_ocr import IncrementalOcr
+
+FRAMES = 30
+SCREENSHOT = "assets/images/screenshot_5.png"
+LINE_POS = (40, 20)
+
+
+def make_frames():
+    base = Image.open(SCREENSHOT).convert("RGB")
+    font = ImageFont.load_default(size=32)
+    frames = []
+    for i in range(FRAMES):
+        img = base.copy()
+        draw = ImageDraw.Draw(img)
+        # same length every frame so the line keeps its detection box
+        draw.rectangle((LINE_POS[0], LINE_POS[1], LINE_POS[0] + 420, LINE_POS[1] + 44), fill=(0, 0, 0))
+        draw.text((LINE_POS[0] + 10, LINE_POS[1] + 4), f"Subtitle line {i:04d}", fill=(255, 255, 255), font=font)
+        frames.append(np.asarray(img))
+    return frames
+
+
+def run(name, predict, frames):
+    predict(frames[0]) # warmup, and the incremental path does its full detection here
+    latencies = []
+    for frame in frames[1:]:
+        start = time.perf_counter()
+        res = predict(frame)
+        latencies.append(time.perf_counter() - start)
+    lat = np.array(latencies) * 1000
+    print(f"{name:>11} | p50 {np.percentile(lat, 50):7.1f} ms | p99 {np.percentile(lat, 99):7.1f} ms "
+          f"| {len(res[0]['rec_texts'])} lines")
+
+
+if __name__ == "__main__":
+    frames = make_frames()
+    ocr_server.load_ocr()
+    run("full", ocr_server.ocr.predict, frames)
+    incremental = IncrementalOcr(*ocr_server.det_rec_models(), threshold=ocr_server.CHANGE_THRESHOLD)
+    run("incremental", incremental.predict, frames)
+    print(incremental.stats())
@@ -0,0 +1,77 @@
+"""
+Replays the screenshots in assets/images ROUNDS times in a row through ocr_server.run_ocr, without
+and with the line cache (utils/ocr_cache.py), like a game UI that keeps going back to the same
+menus. Reports time per frame, cache hit rate and memory, and how many lines still went to the tagger.
+The SQLite run starts with an empty LRU on the database the previous run filled, like a restart.
+Run from the repo root:
+    python tests/ocr/line_cache_bench.py [--profile onnx] [--size 4096]
+"""
+import sys
+sys.path.append(".")
+
+import os
+import glob
+import time
+import tempfile
+import argparse
+import json
+import numpy as np
+from PIL import Image
+import ocr_server
+import utils.language_processor as lang
+
+ROUNDS = 5
+
+tagged_lines = 0
+_batch_split_to_words = lang.batch_split_to_words
+
+
+def counting_split(ps, *args, **kwargs):
+    global tagged_lines
+    tagged_lines += len(ps)
+    return _batch_split_to_words(ps, *args, **kwargs)
+
+
+def run(name, frames):
+    global tagged_lines
+    tagged_lines = 0
+    session = ocr_server.OcrSession()
+    texts = []
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        for frame in frames:
+            session.prev_ocr_key = "" # every frame produces a result, even the same screen twice
+            texts.append(ocr_server.run_ocr(frame, session)['texts'])
+    elapsed = time.perf_counter() - start
+    line = f"{name:>8} | {elapsed / len(texts) * 1000:7.1f} ms/frame | tagged lines {tagged_lines:5d}"
+    if ocr_server.line_cache:
+        stats = ocr_server.line_cache.stats()
+        line += (f" | hit rate {stats['hit_rate']:.0%} ({stats['disk_hits']} from disk)"
+                 f" | {stats['entries']} entries, {stats['memory_kb']} KB")
+    print(line)
+    return texts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--profile", default=ocr_server.OCR_PROFILE)
+    parser.add_argument("--size", type=int, default=ocr_server.LINE_CACHE_SIZE)
+    args = parser.parse_args()
+
+    frames = [np.asarray(Image.open(p).convert("RGB")) for p in sorted(glob.glob("assets/images/screenshot_*"))]
+    lang.batch_split_to_words = counting_split
+    ocr_server.CHANGE_THRESHOLD = -1.0 # every frame counts as changed, this measures OCR only
+    ocr_server.load_ocr(args.profile)
+    ocr_server.det_rec_models()
+    print(f"{len(frames)} screenshots x {ROUNDS} rounds")
+
+    reference = run("no cache", frames)
+    db_path = os.path.join(tempfile.mkdtemp(), "lines.db")
+    ocr_server.load_line_cache(args.size, db_path)
+    cached = run("cache", frames)
+    ocr_server.line_cache.close()
+    ocr_server.load_line_cache(args.size, db_path)
+    from_db = run("sqlite", frames)
+
+    same = lambda texts: sum(json.dumps(a) == json.dumps(b) for a, b in zip(reference, texts)) / len(reference)
+    print(f"frames with the same result as without cache: {same(cached):.0%} (cache), {same(from_db):.0%} (sqlite)")
@@ -0,0 +1,57 @@
+"""
+Load test for ocr_server.py: 1-8 concurrent clients each send frames and wait for the reply.
+Start the server first (python ocr_server.py), then run from the repo root:
+    python tests/ocr/ocr_load_test.py
+Frames cycle through the screenshots in assets/images so consecutive frames never have the same text
+(the server doesn't reply when the text of a client's frame is unchanged).
+"""
+import time
+import glob
+import struct
+import asyncio
+import numpy as np
+from PIL import Image
+
+HOST, PORT = "127.0.0.1", 5000
+FRAMES_PER_CLIENT = 20
+CONCURRENCY = [1, 2, 4, 8]
+REPLY_TIMEOUT = 10.0
+CROP_HEIGHT = 360 # bottom part of each screenshot, roughly a subtitle/dialog region
+
+frames = []
+for path in sorted(glob.glob("assets/images/screenshot_*")):
+    img = np.asarray(Image.open(path).convert("RGB"))
+    frames.append(np.ascontiguousarray(img[-CROP_HEIGHT:]))
+
+
+async def client(latencies, timeouts):
+    reader, writer = await asyncio.open_connection(HOST, PORT)
+    for i in range(FRAMES_PER_CLIENT):
+        frame = frames[i % len(frames)]
+        height, width = frame.shape[:2]
+        start = time.perf_counter()
+        writer.write(struct.pack("<III", width, height, frame.nbytes) + frame.tobytes())
+        await writer.drain()
+        try:
+            size, = struct.unpack("<I", await asyncio.wait_for(reader.readexactly(4), REPLY_TIMEOUT))
+            await reader.readexactly(size)
+            latencies.append(time.perf_counter() - start)
+        except asyncio.TimeoutError:
+            timeouts.append(i) # no reply, eg. the server considered the frame unchanged
+            break
+    writer.close()
+
+
+async def run(n_clients):
+    latencies, timeouts = [], []
+    start = time.perf_counter()
+    await asyncio.gather(*[client(latencies, timeouts) for _ in range(n_clients)])
+    elapsed = time.perf_counter() - start
+    lat = np.array(latencies) * 1000
+    print(f"{n_clients} clients | {len(latencies) / elapsed:6.2f} frames/s "
+          f"| p50 {np.percentile(lat, 50):7.1f} ms | p99 {np.percentile(lat, 99):7.1f} ms | timeouts {len(timeouts)}")
+
+
+if __name__ == "__main__":
+    for n in CONCURRENCY:
+        asyncio.run(run(n))
@@ -0,0 +1,41 @@
+"""
+Cost of turning a captured frame into the RGB array that goes to OCR, per pixel format
+(utils/pixel_formats.decode_frame): whole frame, cropped to a subtitle region, and luma only.
+Also prints the payload size of each format, RGB is what renderer.js used to send after converting in JS.
+Run from the repo root: python tests/ocr/pixel_format_bench.py
+"""
+import sys
+sys.path.append(".")
+
+import time
+import numpy as np
+from utils import pixel_formats as pf
+
+REPEATS = 20
+SIZES = {
+    "720p": (1280, 720),
+    "1080p": (1920, 1080),
+    "4K": (3840, 2160),
+}
+
+
+def bench(buf, fmt, width, height, crop=None, grayscale=False):
+    pf.decode_frame(buf, fmt, width, height, crop, grayscale) # warmup
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        frame = np.ascontiguousarray(pf.decode_frame(buf, fmt, width, height, crop, grayscale))
+    return (time.perf_counter() - start) / REPEATS * 1000
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    for name, (width, height) in SIZES.items():
+        crop = (0, height * 2 // 3, width, height // 3) # bottom third, roughly a subtitle region
+        print(f"--- {name} ({width}x{height}), crop {crop[2]}x{crop[3]} ---")
+        for fmt, fmt_name in pf.FORMAT_NAMES.items():
+            buf = rng.integers(0, 255, pf.frame_size(fmt, width, height), dtype=np.uint8).tobytes()
+            line = (f"{fmt_name:>5} | {len(buf) / 1e6:6.2f} MB | full {bench(buf, fmt, width, height):7.2f} ms "
+                    f"| crop {bench(buf, fmt, width, height, crop):7.2f} ms")
+            if fmt in (pf.I420, pf.NV12):
+                line += f" | crop luma {bench(buf, fmt, width, height, crop, grayscale=True):7.2f} ms"
+            print(line)
@@ -0,0 +1,60 @@
+"""
+Throughput of the OCR worker pool (utils/ocr_pool.py) from 1 to N worker processes. FRAMES frames
+cycling through assets/images are all submitted at once and awaited in submission order, every
+result is checked against the image it belongs to, so out of order completion would show up.
+Run from the repo root:
+    python tests/ocr/pool_scaling_bench.py [--workers 8] [--profile cpu] [--threads 1]
+Use --threads 1 (or a few) so the workers don't fight over cores with the engine's own threading.
+"""
+import sys
+sys.path.append(".")
+
+import os
+import glob
+import time
+import asyncio
+import argparse
+import numpy as np
+from PIL import Image
+from utils.ocr_pool import OcrWorkerPool
+
+FRAMES = 48
+
+
+async def run(pool, frames, reference):
+    start = time.perf_counter()
+    tasks = [asyncio.create_task(pool.predict(frames[i % len(frames)])) for i in range(FRAMES)]
+    in_order = True
+    for i, task in enumerate(tasks):
+        res = await task
+        in_order &= res[0]['rec_texts'] == reference[i % len(frames)]
+    return FRAMES / (time.perf_counter() - start), in_order
+
+
+async def measure(pool, frames, reference):
+    if reference is None: # texts of each image, from the first pool
+        reference = [(await pool.predict(frame))[0]['rec_texts'] for frame in frames]
+    return reference, *await run(pool, frames, reference)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--profile", default="cpu")
+    parser.add_argument("--threads", type=int, default=1)
+    parser.add_argument("--det-model")
+    parser.add_argument("--rec-model")
+    args = parser.parse_args()
+    models = {k: v for k, v in (('det_model', args.det_model), ('rec_model', args.rec_model)) if v}
+
+    frames = [np.asarray(Image.open(p).convert("RGB")) for p in sorted(glob.glob("assets/images/screenshot_*"))]
+    reference, base = None, None
+    n = 1
+    while n <= args.workers:
+        pool = OcrWorkerPool(n, args.profile, slot_size=max(f.nbytes for f in frames), threads=args.threads, **models)
+        pool.start() # workers are warmed up before timing
+        reference, fps, in_order = asyncio.run(measure(pool, frames, reference))
+        pool.close()
+        base = base or fps
+        print(f"{n:2d} workers | {fps:6.2f} frames/s | {fps / base:4.1f}x | results in order: {in_order}")
+        n *= 2
@@ -0,0 +1,69 @@
+"""
+Frame receive throughput: recv_exact (bytes concatenation + np.frombuffer) versus
+recv_exact_into with a FramePool (recv_into a reused buffer, frame is a view of it).
+Run from the repo root: python tests/ocr/recv_bench.py
+"""
+import sys
+sys.path.append(".")
+
+import time
+import struct
+import socket
+import threading
+import numpy as np
+from ocr_server import recv_exact, recv_exact_into, FramePool
+
+FRAMES = 30
+SIZES = {
+    "720p": (1280, 720),
+    "1080p": (1920, 1080),
+    "4K": (3840, 2160),
+}
+
+
+def sender(sock, frame, count):
+    height, width = frame.shape[:2]
+    header = struct.pack("<III", width, height, frame.nbytes)
+    for _ in range(count):
+        sock.sendall(header)
+        sock.sendall(frame)
+
+
+def receive_copy(sock, count):
+    for _ in range(count):
+        width, height, frame_size = struct.unpack("<III", recv_exact(sock, 12))
+        frame = np.frombuffer(recv_exact(sock, frame_size), dtype=np.uint8).reshape((height, width, 3))
+
+
+def receive_pooled(sock, count):
+    pool = FramePool()
+    header = bytearray(12)
+    for _ in range(count):
+        recv_exact_into(sock, memoryview(header))
+        width, height, frame_size = struct.unpack("<III", header)
+        buf = pool.acquire(frame_size)
+        recv_exact_into(sock, memoryview(buf))
+        frame = np.frombuffer(buf, dtype=np.uint8).reshape((height, width, 3))
+        pool.release(buf)
+
+
+def run(receive, frame):
+    a, b = socket.socketpair()
+    t = threading.Thread(target=sender, args=(a, frame, FRAMES))
+    start = time.perf_counter()
+    t.start()
+    receive(b, FRAMES)
+    elapsed = time.perf_counter() - start
+    t.join()
+    a.close()
+    b.close()
+    return FRAMES / elapsed, FRAMES * frame.nbytes / elapsed / 1e6
+
+
+if __name__ == "__main__":
+    for name, (width, height) in SIZES.items():
+        frame = np.random.default_rng(0).integers(0, 255, (height, width, 3), dtype=np.uint8)
+        copy_fps, copy_mbs = run(receive_copy, frame)
+        pool_fps, pool_mbs = run(receive_pooled, frame)
+        print(f"{name:>6} | recv_exact {copy_fps:7.1f} fps {copy_mbs:8.1f} MB/s "
+              f"| recv_into pool {pool_fps:7.1f} fps {pool_mbs:8.1f} MB/s | {pool_fps / copy_fps:.1f}x")
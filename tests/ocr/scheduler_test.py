@@ -0,0 +1,73 @@
+"""
+Capture running faster than OCR: a client produces frames at CAPTURE_FPS for DURATION seconds,
+either sending every frame (flood) or only when it holds a credit from the server's 'ready'
+messages (credits). Prints what the server reports: frames received/dropped, queue age and OCR time.
+Start the server first (python ocr_server.py), then run from the repo root:
+    python tests/ocr/scheduler_test.py
+"""
+import json
+import time
+import glob
+import struct
+import asyncio
+import numpy as np
+from PIL import Image
+
+HOST, PORT = "127.0.0.1", 5000
+CAPTURE_FPS = 30
+DURATION = 10.0
+CROP_HEIGHT = 360
+
+CTRL, CTRL_HELLO, CTRL_STATS = 0, 1, 2
+
+frames = [np.ascontiguousarray(np.asarray(Image.open(p).convert("RGB"))[-CROP_HEIGHT:])
+          for p in sorted(glob.glob("assets/images/screenshot_*"))]
+
+
+async def read_messages(reader, state):
+    while True:
+        size, = struct.unpack("<I", await reader.readexactly(4))
+        msg = json.loads(await reader.readexactly(size))
+        if msg.get('type') == 'ready':
+            state['credits'] += msg['credits']
+        elif msg.get('type') == 'stats':
+            state['stats'].set_result(msg)
+        elif 'type' not in msg:
+            state['replies'] += 1
+
+
+async def run(mode):
+    reader, writer = await asyncio.open_connection(HOST, PORT)
+    state = {'credits': 0, 'replies': 0, 'stats': asyncio.get_running_loop().create_future()}
+    task = asyncio.create_task(read_messages(reader, state))
+    if mode == "credits":
+        hello = json.dumps({'credits': True}).encode()
+        writer.write(struct.pack("<III", CTRL, CTRL_HELLO, len(hello)) + hello)
+
+    sent = skipped = 0
+    start = time.perf_counter()
+    for i in range(int(DURATION * CAPTURE_FPS)):
+        await asyncio.sleep(max(0.0, start + i / CAPTURE_FPS - time.perf_counter()))
+        if mode == "credits":
+            if state['credits'] <= 0:
+                skipped += 1 # dropped on the client, before it costs a copy or a send
+                continue
+            state['credits'] -= 1
+        frame = frames[i % len(frames)]
+        height, width = frame.shape[:2]
+        writer.write(struct.pack("<III", width, height, frame.nbytes) + frame.tobytes())
+        await writer.drain()
+        sent += 1
+
+    writer.write(struct.pack("<III", CTRL, CTRL_STATS, 0))
+    stats = await asyncio.wait_for(state['stats'], 60)
+    print(f"{mode:>7} | sent {sent:4d} | client skipped {skipped:4d} | replies {state['replies']:4d} "
+          f"| server dropped {stats['dropped']:4d} | queue age {stats['queue_age_ms']:7.1f} ms "
+          f"(p99 {stats['queue_age_p99_ms']:7.1f}) | ocr {stats['ocr_ms']:6.1f} ms")
+    task.cancel()
+    writer.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(run("flood"))
+    asyncio.run(run("credits"))
@@ -0,0 +1,79 @@
+"""
+Drives ocr_server.py with frames passed through a shared memory FrameRing instead of TCP payloads,
+and compares frames/s with the plain TCP transport.
+Start the server first (python ocr_server.py), then run from the repo root:
+    python tests/ocr/shm_transport_test.py
+"""
+import sys
+sys.path.append(".")
+
+import json
+import time
+import glob
+import socket
+import struct
+import numpy as np
+from PIL import Image
+from ocr_server import recv_exact, CTRL, CTRL_HELLO
+from utils.frame_ring import FrameRing
+
+HOST, PORT = "127.0.0.1", 5000
+FRAMES = 30
+SLOTS = 4
+
+
+class OcrClient:
+    def __init__(self, transport="shm", slot_size=3840 * 2160 * 3):
+        self.sock = socket.create_connection((HOST, PORT))
+        self.ring = None
+        if transport == "shm":
+            self.ring = FrameRing.create(slots=SLOTS, slot_size=slot_size)
+            hello = json.dumps({'transport': 'shm', 'name': self.ring.name, 'slots': SLOTS, 'slot_size': slot_size}).encode()
+            self.sock.sendall(struct.pack("<III", CTRL, CTRL_HELLO, len(hello)) + hello)
+            if self.recv_reply()['transport'] != 'shm':
+                print("Server refused shared memory, using TCP")
+                self.ring.close()
+                self.ring = None
+        self.transport = "shm" if self.ring else "tcp"
+
+    def recv_reply(self):
+        size, = struct.unpack("<I", recv_exact(self.sock, 4))
+        return json.loads(recv_exact(self.sock, size))
+
+    def send_frame(self, frame):
+        height, width = frame.shape[:2]
+        header = struct.pack("<III", width, height, frame.nbytes)
+        if self.ring:
+            slot = self.ring.acquire()
+            while slot is None: # the server still holds every slot
+                time.sleep(0.001)
+                slot = self.ring.acquire()
+            self.ring.write(slot, frame)
+            self.sock.sendall(header + struct.pack("<I", slot))
+        else:
+            self.sock.sendall(header)
+            self.sock.sendall(frame)
+
+    def close(self):
+        self.sock.close()
+        if self.ring:
+            self.ring.close()
+
+
+def run(transport, frames):
+    client = OcrClient(transport)
+    start = time.perf_counter()
+    for i in range(FRAMES):
+        client.send_frame(frames[i % len(frames)])
+        client.recv_reply()
+    elapsed = time.perf_counter() - start
+    print(f"{client.transport:>4}: {FRAMES / elapsed:6.2f} frames/s, {elapsed / FRAMES * 1000:7.1f} ms/frame")
+    client.close()
+
+
+if __name__ == "__main__":
+    # consecutive frames must differ in text, otherwise the server doesn't reply
+    frames = [np.ascontiguousarray(np.asarray(Image.open(p).convert("RGB")))
+              for p in sorted(glob.glob("assets/images/screenshot_*"))]
+    run("tcp", frames)
+    run("shm", frames)
@@ -0,0 +1,196 @@
+"""
+ASR backends used by super_asr.py.
+
+Every backend exposes the same interface:
+    load()                                   load the model (called automatically on first use)
+    transcribe_pcm(samples)                  float32 16kHz PCM -> {'text': str, 'timestamp': [[start_ms, end_ms], ...] | None}
+    transcribe_stream(chunk, cache, is_final) incremental decode, returns only the text for the new chunk
+    transcribe_batch(batch)                  list of float32 PCM segments -> list of transcribe_pcm results
+
+Backends are registered by name and picked from config, heavy imports (funasr, faster_whisper,
+FireRedASR, torch) only happen inside load() so importing this module is cheap.
+"""
+
+import os
+import sys
+import json
+import tempfile
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+BACKENDS = {}   # name -> backend class
+_instances = {} # (name, config as sorted JSON) -> backend instance
+
+
+def register_backend(name):
+    def decorator(cls):
+        cls.name = name
+        BACKENDS[name] = cls
+        return cls
+    return decorator
+
+
+def get_backend(name, **config):
+    """Return the backend registered as `name`. Instances are shared per config and load lazily."""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown ASR backend '{name}', choose from {sorted(BACKENDS)}")
+    key = (name, json.dumps(config, sort_keys=True, default=repr)) # config values may be dicts/lists (decode options)
+    if key not in _instances:
+        _instances[key] = BACKENDS[name](**config)
+    return _instances[key]
+
+
+class ASRBackend:
+    name = None
+
+    def __init__(self, **config):
+        self.config = config
+        self._model = None
+
+    @property
+    def model(self):
+        if self._model is None:
+            self._model = self.load()
+        return self._model
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    def load(self):
+        raise NotImplementedError
+
+    def transcribe_pcm(self, samples: np.ndarray) -> dict:
+        raise NotImplementedError
+
+    def transcribe_batch(self, batch: list) -> list:
+        """Fallback for models without batched decoding: one call per segment."""
+        return [self.transcribe_pcm(samples) for samples in batch]
+
+    def transcribe_stream(self, chunk: np.ndarray, cache: dict, is_final: bool, **options) -> str:
+        """
+        Fallback for models without a native streaming mode: audio is accumulated in `cache`
+        and decoded once the utterance is final.
+        """
+        cache.setdefault('pcm', []).append(chunk)
+        if not is_final:
+            return ""
+        samples = np.concatenate(cache.pop('pcm'))
+        return self.transcribe_pcm(samples)['text'].replace(' ', '')
+
+
+@register_backend("paraformer")
+class ParaformerBackend(ASRBackend):
+    default_model = "paraformer-zh"
+
+    def load(self):
+        from funasr import AutoModel
+        return AutoModel(model=self.config.get('model', self.default_model),
+                         #punc_model="ct-punc",
+                         disable_update=True)
+
+    def transcribe_pcm(self, samples):
+        res = self.model.generate(input=samples)
+        return {'text': res[0]['text'], 'timestamp': res[0].get('timestamp')}
+
+    def transcribe_batch(self, batch):
+        res = self.model.generate(input=list(batch), batch_size=len(batch))
+        return [{'text': r['text'], 'timestamp': r.get('timestamp')} for r in res]
+
+
+@register_backend("paraformer-streaming")
+class ParaformerStreamingBackend(ParaformerBackend):
+    default_model = "paraformer-zh-streaming"
+
+    def transcribe_stream(self, chunk, cache, is_final, **options):
+        # options: chunk_size, encoder_chunk_look_back, decoder_chunk_look_back (see tests/asr/paraformer_test.py)
+        res = self.model.generate(input=chunk, cache=cache, is_final=is_final, **options)
+        return res[0]['text'].replace(' ', '') if res else ""
+
+
+@register_backend("faster-whisper")
+class FasterWhisperBackend(ASRBackend):
+    # FasterWhisper requires cuDNN and cuBLAS (install from Nvidia website)
+    def load(self):
+        from faster_whisper import WhisperModel
+        return WhisperModel(self.config.get('model_size', "turbo"),
+                            device=self.config.get('device', "cuda"),
+                            compute_type=self.config.get('compute_type', "int8_float16"))
+
+    def transcribe_pcm(self, samples):
+        segments, info = self.model.transcribe(samples,
+                                               beam_size=self.config.get('beam_size', 5),
+                                               language=self.config.get('lang'),
+                                               vad_filter=False,
+                                               word_timestamps=True)
+        words, stamps = [], []
+        for seg in segments:
+            for w in seg.words or []:
+                if w.word.strip():
+                    words.append(w.word.strip())
+                    stamps.append([int(w.start * 1000), int(w.end * 1000)])
+        return {'text': " ".join(words), 'timestamp': stamps or None}
+
+
+@register_backend("fireredasr")
+class FireRedBackend(ASRBackend):
+    decode_config = {
+        "use_gpu": 1,
+        "beam_size": 3,
+        "nbest": 1,
+        "decode_max_len": 0,
+        "softmax_smoothing": 1.25,
+        "aed_length_penalty": 0.6,
+        "eos_penalty": 1.0
+    }
+
+    def load(self):
+        sys.path.append(self.config.get('lib_path', "lib/FireRedASR"))
+        from fireredasr.models.fireredasr import FireRedAsr
+        return FireRedAsr.from_pretrained("aed", self.config.get('model_path', "pretrained_models/FireRedASR-AED-L"))
+
+    def transcribe_pcm(self, samples):
+        return self.transcribe_batch([samples])[0]
+
+    def transcribe_batch(self, batch):
+        # FireRedASR only reads wav paths
+        import soundfile as sf
+        with tempfile.TemporaryDirectory() as tmp:
+            uttids, paths = [], []
+            for i, samples in enumerate(batch):
+                uttids.append(f"utt{i}")
+                paths.append(os.path.join(tmp, f"utt{i}.wav"))
+                sf.write(paths[-1], samples, SAMPLE_RATE, subtype="PCM_16")
+            res = self.model.transcribe(uttids, paths, {**self.decode_config, **self.config.get('decode', {})})
+        texts = {r['uttid']: r['text'] for r in res}
+        return [{'text': texts.get(uttid, ""), 'timestamp': None} for uttid in uttids]
+
+
+@register_backend("dummy")
+class DummyBackend(ASRBackend):
+    """
+    Deterministic stand-in for tests and benchmarks of the streaming loop: emits one char for
+    every `char_ms` of audio above `energy`, the char depends only on that slice of audio.
+    """
+    chars = "的一是不了人我在有他这为之大来以个中上们"
+
+    def load(self):
+        return self # nothing to load
+
+    def _decode(self, samples):
+        step = SAMPLE_RATE * self.config.get('char_ms', 200) // 1000
+        text, stamps = [], []
+        for i in range(0, len(samples) - step + 1, step):
+            level = float(np.abs(samples[i:i + step]).mean())
+            if level > self.config.get('energy', 0.01):
+                text.append(self.chars[int(level * 1000) % len(self.chars)])
+                stamps.append([i * 1000 // SAMPLE_RATE, (i + step) * 1000 // SAMPLE_RATE])
+        return "".join(text), stamps
+
+    def transcribe_pcm(self, samples):
+        text, stamps = self._decode(samples)
+        return {'text': text, 'timestamp': stamps}
+
+    def transcribe_stream(self, chunk, cache, is_final, **options):
+        return self._decode(chunk)[0]
@@ -0,0 +1,200 @@
+"""
+Batch transcription of recorded audio files (subtitle/study material backfill).
+
+Pipeline:
+ 1. stream-decode every file in windows of WINDOW_SECONDS (mono, 16kHz float32)
+ 2. split each window into speech segments with silero's get_speech_timestamps
+ 3. pool segments from many files and pack them into length-bucketed batches
+ 4. run backend.transcribe_batch on each batch
+ 5. reassemble the segments of every file into a timestamped transcript (JSON + SRT)
+
+Entry point: python super_asr.py transcribe-batch <files or dirs> --out-dir transcripts --batch-size 16
+"""
+
+import os
+import json
+import time
+from collections import defaultdict
+import numpy as np
+
+from utils.asr_backends import SAMPLE_RATE
+
+WINDOW_SECONDS = 600          # audio decoded at once per file
+MAX_SEGMENT_SECONDS = 20      # VAD splits longer speech so batches stay evenly sized
+MAX_BATCH_SECONDS = 300       # upper bound on audio per batch (memory)
+POOL_BATCHES = 8              # segments pooled before packing, more = better length bucketing
+AUDIO_EXTS = (".wav", ".ogg", ".flac", ".mp3") # what soundfile can decode
+
+
+def collect_files(paths):
+    """
+    [(path, name)] of every audio file, name is where its transcript goes under the output dir:
+    the path relative to the directory it was found in, without extension, made unique if needed.
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, names in os.walk(path):
+                dirs.sort()
+                for n in sorted(names):
+                    if n.lower().endswith(AUDIO_EXTS):
+                        full = os.path.join(root, n)
+                        files.append((full, os.path.splitext(os.path.relpath(full, path))[0]))
+        else:
+            files.append((path, os.path.splitext(os.path.basename(path))[0]))
+
+    used = set()
+    unique = []
+    for path, name in files:
+        base, i = name, 2
+        while name in used:
+            name = f"{base}_{i}"
+            i += 1
+        if name != base:
+            print(f"Transcript of {path} is written as {name}, {base} is taken by another file")
+        used.add(name)
+        unique.append((path, name))
+    return unique
+
+
+def decode_windows(path, window_seconds=WINDOW_SECONDS):
+    """Yield (offset_samples, float32 mono 16kHz PCM) windows of a file without loading it all."""
+    import soundfile as sf
+    with sf.SoundFile(path) as f:
+        sr = f.samplerate
+        offset = 0
+        for block in f.blocks(blocksize=int(window_seconds * sr), dtype="float32", always_2d=True):
+            pcm = block[:, 0]
+            if sr != SAMPLE_RATE:
+                import librosa
+                pcm = librosa.resample(pcm, orig_sr=sr, target_sr=SAMPLE_RATE)
+            yield offset, np.ascontiguousarray(pcm, dtype=np.float32)
+            offset += len(pcm)
+
+
+def split_segments(pcm, vad_model, max_segment_seconds=MAX_SEGMENT_SECONDS):
+    """Return [(start, end)] speech sample ranges in pcm."""
+    import torch
+    from silero_vad import get_speech_timestamps
+    stamps = get_speech_timestamps(torch.from_numpy(pcm), vad_model,
+                                   sampling_rate=SAMPLE_RATE,
+                                   max_speech_duration_s=max_segment_seconds)
+    return [(ts['start'], ts['end']) for ts in stamps]
+
+
+def pack_batches(segments, batch_size, max_batch_seconds=MAX_BATCH_SECONDS):
+    """Sort segments by length and cut them into batches, so each batch needs little padding."""
+    segments = sorted(segments, key=lambda seg: len(seg['pcm']))
+    batches, batch, batch_samples = [], [], 0
+    for seg in segments:
+        if batch and (len(batch) >= batch_size or batch_samples + len(seg['pcm']) > max_batch_seconds * SAMPLE_RATE):
+            batches.append(batch)
+            batch, batch_samples = [], 0
+        batch.append(seg)
+        batch_samples += len(seg['pcm'])
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def format_srt_time(ms):
+    h, ms = divmod(int(ms), 3600000)
+    m, ms = divmod(ms, 60000)
+    s, ms = divmod(ms, 1000)
+    return f"{h:02}:{m:02}:{s:02},{ms:03}"
+
+
+def write_transcript(path, segments, out_dir, name=None):
+    """Write <name>.json (segments with char timestamps) and <name>.srt next to each other in out_dir.
+    name may contain directories, default is the file's stem."""
+    segments = sorted(segments, key=lambda seg: seg['start_ms'])
+    stem = os.path.join(out_dir, name or os.path.splitext(os.path.basename(path))[0])
+    os.makedirs(os.path.dirname(stem), exist_ok=True)
+    with open(stem + ".json", "w", encoding="utf-8") as f:
+        json.dump({'file': path,
+                   'text': "".join(seg['text'] for seg in segments),
+                   'segments': segments}, f, ensure_ascii=False, indent=2)
+    with open(stem + ".srt", "w", encoding="utf-8") as f:
+        for i, seg in enumerate(s for s in segments if s['text']):
+            f.write(f"{i + 1}\n{format_srt_time(seg['start_ms'])} --> {format_srt_time(seg['end_ms'])}\n{seg['text']}\n\n")
+
+
+class BatchTranscriber:
+    def __init__(self, backend, vad_model, out_dir, batch_size=16):
+        self.backend = backend
+        self.vad_model = vad_model
+        self.out_dir = out_dir
+        self.batch_size = batch_size
+
+        self._pool = [] # segments waiting to be packed
+        self._results = defaultdict(list) # file -> transcribed segments
+        self._pending = defaultdict(int) # file -> segments not transcribed yet
+        self._decoded = set() # files whose audio has been fully split
+        self._names = {} # file -> transcript name under out_dir
+
+        self.audio_seconds = 0.0
+        self.speech_seconds = 0.0
+        self.batches = 0
+        self.inference_seconds = 0.0
+
+    def add_file(self, path, name=None):
+        if name: self._names[path] = name
+        for offset, pcm in decode_windows(path):
+            self.audio_seconds += len(pcm) / SAMPLE_RATE
+            for start, end in split_segments(pcm, self.vad_model):
+                self._pool.append({'file': path, 'offset': offset + start, 'pcm': pcm[start:end]})
+                self._pending[path] += 1
+                self.speech_seconds += (end - start) / SAMPLE_RATE
+            if len(self._pool) >= self.batch_size * POOL_BATCHES:
+                self._flush_pool()
+        self._decoded.add(path)
+        self._write_finished()
+
+    def finish(self):
+        self._flush_pool()
+        self._write_finished()
+
+    def _flush_pool(self):
+        for batch in pack_batches(self._pool, self.batch_size):
+            self._run_batch(batch)
+        self._pool = []
+
+    def _run_batch(self, batch):
+        start = time.perf_counter()
+        results = self.backend.transcribe_batch([seg['pcm'] for seg in batch])
+        self.inference_seconds += time.perf_counter() - start
+        self.batches += 1
+        for seg, res in zip(batch, results):
+            offset_ms = seg['offset'] * 1000 // SAMPLE_RATE
+            stamps = res.get('timestamp')
+            self._results[seg['file']].append({
+                'start_ms': offset_ms,
+                'end_ms': offset_ms + len(seg['pcm']) * 1000 // SAMPLE_RATE,
+                'text': res['text'].replace(' ', ''),
+                'timestamp': [[s + offset_ms, e + offset_ms] for s, e in stamps] if stamps else None,
+            })
+            self._pending[seg['file']] -= 1
+
+    def _write_finished(self):
+        for path in list(self._decoded):
+            if self._pending[path] == 0:
+                write_transcript(path, self._results.pop(path, []), self.out_dir, self._names.pop(path, None))
+                self._decoded.discard(path)
+                print(f"Transcribed {path}")
+
+
+def transcribe_batch(paths, backend, out_dir="transcripts", batch_size=16):
+    from silero_vad import load_silero_vad
+    files = collect_files(paths)
+    transcriber = BatchTranscriber(backend, load_silero_vad(), out_dir, batch_size=batch_size)
+
+    start = time.perf_counter()
+    for path, name in files:
+        transcriber.add_file(path, name)
+    transcriber.finish()
+    elapsed = time.perf_counter() - start
+
+    print(f"{len(files)} files | {transcriber.audio_seconds:.1f}s audio ({transcriber.speech_seconds:.1f}s speech) "
+          f"| {transcriber.batches} batches | inference {transcriber.inference_seconds:.1f}s "
+          f"| {transcriber.audio_seconds / max(elapsed, 1e-9):.1f}x real time")
+    return transcriber
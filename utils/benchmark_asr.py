@@ -0,0 +1,179 @@
+"""
+Offline benchmark for the streaming ASR pipeline.
+
+Replays every audio file in a directory through StreamingASR (via simulate_microphone_stream)
+faster than real time and reports per-step inference latency, real-time factor, first-token and
+final-commit latency and CER against a reference transcript stored next to the audio (same name, .txt).
+
+    python -m utils.benchmark_asr assets/asr_eval --backend paraformer --step 0.5 --speed 4 --out bench.json
+
+Results are written as JSON so runs with different STEP_SECONDS / CONTEXT_SECONDS / VAD settings can be compared.
+"""
+
+import os
+import re
+import json
+import time
+import asyncio
+import argparse
+import numpy as np
+
+import super_asr
+from super_asr import (RollingBuffer, StreamingASR, IncrementalStreamingASR,
+                       simulate_microphone_stream, read_audio_int16)
+from utils.asr_backends import get_backend
+
+AUDIO_EXTS = (".wav", ".ogg", ".flac", ".mp3")
+
+
+def normalize_text(text):
+    """Drop whitespace and punctuation so CER only counts recognized characters."""
+    return re.sub(r"[\s\W_]+", "", text)
+
+
+def edit_distance(a, b):
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        for j, cb in enumerate(b, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        prev = cur
+    return prev[-1]
+
+
+def cer(hyp, ref):
+    hyp, ref = normalize_text(hyp), normalize_text(ref)
+    if not ref:
+        return float(len(hyp) > 0)
+    return edit_distance(hyp, ref) / len(ref)
+
+
+def percentiles(values):
+    if not values:
+        return {}
+    arr = np.array(values) * 1000
+    return {f"p{p}": round(float(np.percentile(arr, p)), 2) for p in (50, 90, 99)} | {'mean': round(float(arr.mean()), 2)}
+
+
+def find_pairs(data_dir):
+    """Return (audio_path, reference_text) for every audio file that has a transcript."""
+    pairs = []
+    for name in sorted(os.listdir(data_dir)):
+        stem, ext = os.path.splitext(name)
+        ref_path = os.path.join(data_dir, stem + ".txt")
+        if ext.lower() in AUDIO_EXTS and os.path.exists(ref_path):
+            with open(ref_path, encoding="utf-8") as f:
+                pairs.append((os.path.join(data_dir, name), f.read().strip()))
+    return pairs
+
+
+async def run_file(path, reference, backend, args):
+    rb = RollingBuffer(args.context, super_asr.SAMPLE_RATE)
+    timing = {'first_token': None}
+
+    def on_emit(asr, committed, tentative):
+        if timing['first_token'] is None and (committed or tentative):
+            timing['first_token'] = time.perf_counter()
+
+    cls = IncrementalStreamingASR if args.incremental else StreamingASR
+    asr = cls(backend=backend, buffer=rb, step_seconds=args.step, emit_callback=on_emit, agreement_n=args.agreement_n)
+
+    # speech is first fed once the VAD fires, track when that happens
+    feed = asr.feed
+    def timed_feed(pcm16):
+        timing.setdefault('first_audio', time.perf_counter())
+        feed(pcm16)
+    asr.feed = timed_feed
+
+    commit = asr.commit_utterance
+    def timed_commit():
+        timing['last_commit'] = time.perf_counter()
+        commit()
+    asr.commit_utterance = timed_commit
+
+    duration = len(read_audio_int16(path)) / super_asr.SAMPLE_RATE
+    start = time.perf_counter()
+    await simulate_microphone_stream(asr, wav_path=path, speed=args.speed, vad_threshold=args.vad_threshold)
+    end = time.perf_counter()
+    await asr.stop()
+
+    hyp = "".join(asr.text_outputs)
+    first_audio = timing.get('first_audio')
+    return {
+        'file': os.path.basename(path),
+        'audio_seconds': round(duration, 3),
+        'wall_seconds': round(end - start, 3),
+        'inference_seconds': round(sum(asr.step_latencies), 3),
+        'rtf': round(sum(asr.step_latencies) / duration, 4) if duration else None,
+        'first_token_latency_ms': round((timing['first_token'] - first_audio) * 1000, 1) if timing['first_token'] and first_audio else None,
+        'final_commit_latency_ms': round((end - timing['last_commit']) * 1000, 1) if 'last_commit' in timing else None,
+        'step_latency_ms': percentiles(list(asr.step_latencies)),
+        'cer': round(cer(hyp, reference), 4),
+        'hypothesis': hyp,
+        'reference': reference,
+        **asr.stats(),
+    }
+
+
+async def run(args):
+    pairs = find_pairs(args.data_dir)
+    if not pairs:
+        raise SystemExit(f"No audio files with .txt references found in {args.data_dir}")
+
+    backend_name = "paraformer-streaming" if args.incremental and args.backend == "paraformer" else args.backend
+    backend = get_backend(backend_name)
+    backend.model # load before timing anything
+
+    files = []
+    for path, reference in pairs:
+        res = await run_file(path, reference, backend, args)
+        print(f"{res['file']}: CER {res['cer']:.3f} | RTF {res['rtf']} | step p50 {res['step_latency_ms'].get('p50')} ms")
+        files.append(res)
+
+    step_p50s = [f['step_latency_ms']['p50'] for f in files if f['step_latency_ms']]
+    total_audio = sum(f['audio_seconds'] for f in files)
+    total_chars = sum(len(normalize_text(f['reference'])) for f in files)
+    summary = {
+        'files': len(files),
+        'audio_seconds': round(total_audio, 3),
+        'rtf': round(sum(f['inference_seconds'] for f in files) / total_audio, 4) if total_audio else None,
+        # CER over the whole set, weighted by reference length
+        'cer': round(sum(f['cer'] * len(normalize_text(f['reference'])) for f in files) / max(total_chars, 1), 4),
+        'median_step_p50_ms': round(float(np.median(step_p50s)), 2) if step_p50s else None,
+        'skipped_steps': sum(f['skipped_steps'] for f in files),
+    }
+    config = {
+        'backend': backend_name,
+        'incremental': args.incremental,
+        'step_seconds': args.step,
+        'context_seconds': args.context,
+        'vad_threshold': args.vad_threshold,
+        'agreement_n': args.agreement_n,
+        'speed': args.speed,
+    }
+    return {'config': config, 'summary': summary, 'files': files}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark streaming ASR on a directory of audio + .txt references")
+    parser.add_argument("data_dir")
+    parser.add_argument("--backend", default=super_asr.ASR_BACKEND)
+    parser.add_argument("--incremental", action="store_true", help="use IncrementalStreamingASR")
+    parser.add_argument("--step", type=float, default=super_asr.STEP_SECONDS, help="STEP_SECONDS")
+    parser.add_argument("--context", type=float, default=super_asr.CONTEXT_SECONDS, help="CONTEXT_SECONDS")
+    parser.add_argument("--vad-threshold", type=float, default=super_asr.VAD_THRESHOLD)
+    parser.add_argument("--agreement-n", type=int, default=super_asr.AGREEMENT_N)
+    parser.add_argument("--speed", type=float, default=4.0, help="replay speed relative to real time (0 = as fast as possible)")
+    parser.add_argument("--out", default=None, help="write results as JSON")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    print(json.dumps(results['summary'], ensure_ascii=False, indent=2))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"Results saved to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Cheap change detection for captured frames, run before OCR. A frame is reduced to the mean
+brightness of BLOCK x BLOCK pixel blocks and compared with the last frame that was processed.
+Subtitles and UI text mostly sit still between changes, so an unchanged frame skips OCR entirely.
+"""
+
+import numpy as np
+
+
+def block_means(frame, block=16):
+    """Downscale an (h, w, 3) RGB or (h, w) gray frame to the mean of each block (float32)."""
+    gray = frame[..., 1] if frame.ndim == 3 else frame # green is close enough to luma
+    h, w = gray.shape
+    rows, cols = max(h // block, 1), max(w // block, 1)
+    bh, bw = h // rows, w // cols
+    # leftover pixels on the right/bottom edge (< one block) are ignored
+    blocks = gray[:rows * bh, :cols * bw].reshape((rows, bh, cols, bw))
+    return blocks.mean(axis=(1, 3), dtype=np.float32)
+
+
+class FrameChangeDetector:
+    """
+    threshold: a frame counts as changed when any block's mean brightness moved by more than
+    this (0-255). Video compression noise stays well below ~4, a new line of text moves
+    the blocks under it by tens.
+    """
+    def __init__(self, threshold=8.0, block=16):
+        self.threshold = threshold
+        self.block = block
+        self.reference = None # block means of the last processed frame
+        self.processed = 0
+        self.skipped = 0
+
+    def changed(self, frame):
+        """True if the frame should be processed, it then becomes the new reference."""
+        means = block_means(frame, self.block)
+        if (self.reference is None or self.reference.shape != means.shape
+                or np.abs(means - self.reference).max() > self.threshold):
+            self.reference = means
+            self.processed += 1
+            return True
+        self.skipped += 1
+        return False
+
+    def reset(self):
+        self.reference = None
+
+    def stats(self):
+        total = self.processed + self.skipped
+        return {
+            'processed': self.processed,
+            'skipped': self.skipped,
+            'skip_rate': self.skipped / total if total else 0.0,
+        }
@@ -0,0 +1,91 @@
+"""
+Ring of frame slots in shared memory (multiprocessing.shared_memory, backed by /dev/shm on Linux),
+so frames can be handed between processes without going through a socket.
+
+Layout: one state byte per slot (FREE / FILLED) followed by `slots` slots of `slot_size` bytes.
+The producer writes a frame into a FREE slot and marks it FILLED, the consumer marks it FREE
+again once it is done with the frame. Only the slot index and frame dimensions need to be sent.
+"""
+
+import numpy as np
+from multiprocessing import shared_memory
+
+FREE = 0
+FILLED = 1
+
+
+def _attach(name):
+    try:
+        return shared_memory.SharedMemory(name=name, track=False) # python >= 3.13
+    except TypeError:
+        # the creator owns the segment, don't let this process' resource tracker unlink it on exit
+        from multiprocessing import resource_tracker
+        register = resource_tracker.register
+        resource_tracker.register = lambda *args, **kwargs: None
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+class FrameRing:
+    def __init__(self, shm, slots, slot_size, owner):
+        self.shm = shm
+        self.slots = slots
+        self.slot_size = slot_size
+        self._owner = owner
+        self._next = 0
+        self.state = np.ndarray((slots,), dtype=np.uint8, buffer=shm.buf)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @classmethod
+    def create(cls, slots=4, slot_size=3840 * 2160 * 3, name=None):
+        shm = shared_memory.SharedMemory(name=name, create=True, size=slots + slots * slot_size)
+        ring = cls(shm, slots, slot_size, owner=True)
+        ring.state[:] = FREE
+        return ring
+
+    @classmethod
+    def attach(cls, name, slots, slot_size):
+        shm = _attach(name)
+        if shm.size < slots + slots * slot_size:
+            shm.close()
+            raise ValueError(f"Shared memory '{name}' is too small for {slots} slots of {slot_size} bytes")
+        return cls(shm, slots, slot_size, owner=False)
+
+    def slot_view(self, idx, size=None):
+        """memoryview of slot idx (its first `size` bytes), release it before closing the ring."""
+        if not 0 <= idx < self.slots:
+            raise IndexError(f"Slot {idx} out of range")
+        size = self.slot_size if size is None else size
+        if size > self.slot_size:
+            raise ValueError(f"Frame of {size} bytes doesn't fit in a {self.slot_size} byte slot")
+        offset = self.slots + idx * self.slot_size
+        return self.shm.buf[offset: offset + size]
+
+    def acquire(self):
+        """Producer side: index of the next FREE slot in ring order, or None if the consumer is behind."""
+        for i in range(self.slots):
+            idx = (self._next + i) % self.slots
+            if self.state[idx] == FREE:
+                self._next = idx + 1
+                return idx
+        return None
+
+    def write(self, idx, frame):
+        with self.slot_view(idx, frame.nbytes) as view:
+            np.copyto(np.frombuffer(view, dtype=np.uint8), frame.reshape(-1))
+        self.state[idx] = FILLED
+
+    def release(self, idx):
+        """Consumer side: the frame in slot idx is no longer needed."""
+        self.state[idx] = FREE
+
+    def close(self):
+        del self.state
+        self.shm.close()
+        if self._owner:
+            self.shm.unlink()
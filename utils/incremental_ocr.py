@@ -0,0 +1,98 @@
+"""
+Incremental OCR for a mostly static region: detection boxes, a small image hash of each box and
+its recognized text are kept from the previous frame. On the next frame only boxes whose pixels
+changed are recognized again, and detection only reruns when something changed outside the known
+boxes (a line appeared, moved or got longer) or the frame size changed.
+
+det / rec are PaddleOCR TextDetection / TextRecognition models or an engine's det_rec() (utils/ocr_engine.py).
+"""
+
+import numpy as np
+from utils.frame_change import block_means
+from utils.ocr_engine import polys_to_boxes
+
+HASH_BLOCK = 8 # box hashes are the mean of 8x8 pixel blocks, text lines are only ~20-60 px tall
+LAYOUT_BLOCK = 16
+BOX_MARGIN = 4 # px around a box that still counts as inside it
+
+
+class IncrementalOcr:
+    def __init__(self, det, rec, threshold=8.0):
+        self.det = det
+        self.rec = rec
+        self.threshold = threshold
+        self.reset()
+        self.full_detections = 0
+        self.recognized = 0 # boxes sent to recognition
+        self.reused = 0 # boxes whose text was reused
+
+    def reset(self):
+        self.layout = None # block means of the last frame, to spot changes outside the boxes
+        self.boxes = [] # [x0, y0, x1, y1]
+        self.hashes = []
+        self.texts = []
+        self.scores = []
+
+    def _changed(self, a, b):
+        return a.shape != b.shape or np.abs(a - b).max() > self.threshold
+
+    def _box_hash(self, frame, box):
+        x0, y0, x1, y1 = box
+        return block_means(frame[y0:y1, x0:x1], HASH_BLOCK)
+
+    def _recognize(self, frame, boxes):
+        if not boxes: return []
+        crops = [np.ascontiguousarray(frame[y0:y1, x0:x1]) for x0, y0, x1, y1 in boxes]
+        self.recognized += len(crops)
+        return [(r['rec_text'], float(r['rec_score'])) for r in self.rec.predict(crops)]
+
+    def _detect(self, frame):
+        self.full_detections += 1
+        height, width = frame.shape[:2]
+        return polys_to_boxes(self.det.predict(frame)[0]['dt_polys'], width, height)
+
+    def _outside_boxes(self, changed):
+        """True if any changed layout block isn't covered by a known box."""
+        covered = np.zeros_like(changed)
+        for x0, y0, x1, y1 in self.boxes:
+            covered[max(y0 - BOX_MARGIN, 0) // LAYOUT_BLOCK: (y1 + BOX_MARGIN) // LAYOUT_BLOCK + 1,
+                    max(x0 - BOX_MARGIN, 0) // LAYOUT_BLOCK: (x1 + BOX_MARGIN) // LAYOUT_BLOCK + 1] = True
+        return bool((changed & ~covered).any())
+
+    def predict(self, frame):
+        """Same result layout as PaddleOCR.predict: [{'rec_texts', 'rec_scores', 'rec_boxes'}]."""
+        layout = block_means(frame, LAYOUT_BLOCK)
+        full = (self.layout is None or layout.shape != self.layout.shape
+                or self._outside_boxes(np.abs(layout - self.layout) > self.threshold))
+        self.layout = layout
+
+        if full:
+            self.boxes = self._detect(frame)
+            self.hashes = [self._box_hash(frame, box) for box in self.boxes]
+            results = self._recognize(frame, self.boxes)
+            self.texts = [text for text, _ in results]
+            self.scores = [score for _, score in results]
+        else:
+            # same layout, only recognize the boxes whose pixels changed
+            changed = []
+            for i, box in enumerate(self.boxes):
+                box_hash = self._box_hash(frame, box)
+                if self._changed(box_hash, self.hashes[i]):
+                    self.hashes[i] = box_hash
+                    changed.append(i)
+            self.reused += len(self.boxes) - len(changed)
+            for i, (text, score) in zip(changed, self._recognize(frame, [self.boxes[i] for i in changed])):
+                self.texts[i], self.scores[i] = text, score
+
+        return [{
+            'rec_texts': list(self.texts),
+            'rec_scores': list(self.scores),
+            'rec_boxes': np.array(self.boxes, dtype=np.int32).reshape((-1, 4)),
+        }]
+
+    def stats(self):
+        return {
+            'full_detections': self.full_detections,
+            'recognized_boxes': self.recognized,
+            'reused_boxes': self.reused,
+        }
@@ -1,7 +1,15 @@
+import re
+import time
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from math import log
+import numpy as np
 from simhash import Simhash
 import pypinyin
 import jieba
-import hanlp
 
 
 # --- Text-segmentation based on on two different approaches
@@ -9,52 +17,262 @@ import hanlp
 # Hanlp uses a more accurate but slower transformer model.
 # Pkuseg is inbetween the two in accuracy-speed tradeoff
 def split_to_words_fast(p):
+    words = segment_cache.get(p, JIEBA_TASKS)
+    if words is not None: return words
     try:
-        return jieba.cut(p)
+        start = time.perf_counter()
+        words = list(jieba.cut(p))
+        segment_cache.put(p, JIEBA_TASKS, words, time.perf_counter() - start)
+        return words
     except Exception as e:
         print(f"An error occurred during text segmentation: {e}")
         return []
 
-try:
-    print("Loading HanLP Multi-Task Learning Model for CWS and POS...")
-    # ELECTRA model is much faster than the BERT model
-    tagger = hanlp.load(hanlp.pretrained.mtl.CLOSE_TOK_POS_NER_SRL_DEP_SDP_CON_ELECTRA_SMALL_ZH, device=0)
-    print("Model loaded successfully.")
-except Exception as e:
-    print(f"Error loading HanLP model: {e}")
 
-def split_to_words(p, tasks=['tok/fine', 'pos/ctb']):
+# ELECTRA model is much faster than the BERT model
+HANLP_MODEL = "CLOSE_TOK_POS_NER_SRL_DEP_SDP_CON_ELECTRA_SMALL_ZH"
+
+
+class LazyTagger:
+    """
+    The HanLP multi-task model, loaded in a background thread on first use or on warmup(), so
+    importing this module doesn't block (importing hanlp pulls in torch). Tries the GPU first when
+    there is one and falls back to the CPU. Until the model is ready, or if it can't be loaded at
+    all, split_to_words / batch_split_to_words answer with jieba instead.
+    """
+    def __init__(self, model=HANLP_MODEL, device=None):
+        self.model_name = model
+        self.device = device # None = GPU 0 if available, else CPU (-1)
+        self.model = None
+        self.error = None
+        self.load_seconds = None
+        self._thread = None
+        self._loaded = threading.Event()
+        self._lock = threading.Lock()
+
+    def warmup(self):
+        """Start loading in the background (once), returns immediately."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._load, name="hanlp-load", daemon=True)
+                self._thread.start()
+        return self
+
+    def _devices(self):
+        if self.device is not None: return [self.device]
+        try:
+            import torch
+            if torch.cuda.is_available(): return [0, -1]
+        except ImportError:
+            pass
+        return [-1]
+
+    def _load(self):
+        start = time.perf_counter()
+        try:
+            import hanlp
+            for device in self._devices():
+                try:
+                    print(f"Loading HanLP Multi-Task Learning Model for CWS and POS (device {device})...")
+                    self.model = hanlp.load(getattr(hanlp.pretrained.mtl, self.model_name), device=device)
+                    print(f"Model loaded successfully in {time.perf_counter() - start:.1f}s.")
+                    break
+                except Exception as e:
+                    print(f"Error loading HanLP model on device {device}: {e}")
+                    self.error = e
+        except Exception as e:
+            print(f"Error loading HanLP model: {e}")
+            self.error = e
+        if self.model is not None: self.error = None
+        self.load_seconds = time.perf_counter() - start
+        self._loaded.set()
+
+    @property
+    def ready(self):
+        return self.model is not None
+
+    def wait(self, timeout=None):
+        """Block until loading finished (starting it if needed), True if the model is usable."""
+        self.warmup()
+        self._loaded.wait(timeout)
+        return self.ready
+
+    def __call__(self, *args, **kwargs):
+        if not self.wait(): raise RuntimeError(f"HanLP model unavailable: {self.error}")
+        return self.model(*args, **kwargs)
+
+
+tagger = LazyTagger()
+
+
+# --- Memoized segmentation: OCR and ASR keep producing the same lines (subtitles, UI labels)
+JIEBA_TASKS = ('jieba',)
+
+
+class SegmentationCache:
+    """
+    Segmentation results keyed by (text, tasks): a bounded LRU, optionally backed by SQLite so
+    results survive restarts. Also keeps the tagger time per text, to estimate the time hits saved.
+    """
+    def __init__(self, max_entries=8192, db_path=None):
+        self.max_entries = max_entries
+        self.entries = OrderedDict() # (text, tasks) -> words as a tuple, get() hands out list copies
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self.cost = {} # tasks -> [seconds, texts] spent computing entries
+        self._lock = threading.Lock() # used from the OCR thread, ASR and the event loop
+        self.db = None
+        if db_path:
+            self.db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("PRAGMA synchronous=NORMAL")
+            self.db.execute("CREATE TABLE IF NOT EXISTS segmentation "
+                            "(text TEXT, tasks TEXT, words TEXT, PRIMARY KEY (text, tasks))")
+
+    def _cost_per_text(self, tasks):
+        seconds, texts = self.cost.get(tasks, (0.0, 0))
+        return seconds / texts if texts else 0.0
+
+    def get(self, text, tasks):
+        tasks = tuple(tasks)
+        key = (text, tasks)
+        with self._lock:
+            words = self.entries.get(key)
+            if words is not None:
+                self.hits += 1
+            elif self.db:
+                row = self.db.execute("SELECT words FROM segmentation WHERE text = ? AND tasks = ?",
+                                      (text, ",".join(tasks))).fetchone()
+                if row:
+                    words = tuple(tuple(w) if isinstance(w, list) else w for w in json.loads(row[0]))
+                    self.entries[key] = words
+                    self.disk_hits += 1 # memory and disk hits are counted apart, like LineCache
+            if words is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.saved_seconds += self._cost_per_text(tasks)
+            self._trim()
+            return list(words) # callers may edit their list, the cached entry stays as it was
+
+    def put(self, text, tasks, words, seconds=0.0):
+        """Store one result, `seconds` is what computing it cost (a share of the batch)."""
+        tasks = tuple(tasks)
+        with self._lock:
+            self.entries[(text, tasks)] = tuple(words)
+            self.entries.move_to_end((text, tasks))
+            cost = self.cost.setdefault(tasks, [0.0, 0])
+            cost[0] += seconds
+            cost[1] += 1
+            self._trim()
+            if self.db:
+                self.db.execute("INSERT OR REPLACE INTO segmentation VALUES (?, ?, ?)",
+                                (text, ",".join(tasks), json.dumps(words, ensure_ascii=False)))
+
+    def _trim(self):
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def stats(self):
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            'entries': len(self.entries),
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            'saved_ms': round(self.saved_seconds * 1000, 1),
+        }
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self.hits = self.disk_hits = self.misses = 0
+            self.saved_seconds = 0.0
+
+    def close(self):
+        if self.db: self.db.close()
+
+
+segment_cache = SegmentationCache()
+
+
+def use_segment_cache(max_entries=8192, db_path=None):
+    """Replace the module's segmentation cache, eg. with one backed by SQLite."""
+    global segment_cache
+    segment_cache.close()
+    segment_cache = SegmentationCache(max_entries, db_path)
+    return segment_cache
+
+
+tagger_service = None # utils/tagger_service.py, see use_tagger_service()
+
+
+def use_tagger_service(window_ms=5, max_batch=64):
+    """Coalesce the tagging of concurrent batch_split_to_words calls into shared batches."""
+    global tagger_service
+    from utils.tagger_service import TaggerService
+    if tagger_service: tagger_service.close()
+    tagger_service = TaggerService(tagger, window_ms, max_batch).start()
+    return tagger_service
+
+
+def split_to_words_jieba(p):
+    """jieba words with jieba's POS flags, same layout as split_to_words."""
+    import jieba.posseg
     try:
-        result = tagger(p, tasks)
-        return list(zip(result['tok/fine'], result['pos/ctb']))
+        return [(w.word, w.flag) for w in jieba.posseg.cut(p)]
     except Exception as e:
         print(f"An error occurred during text segmentation: {e}")
         return []
+
+def split_to_words(p, tasks=['tok/fine', 'pos/ctb']):
+    words = batch_split_to_words([p], tasks)
+    return words[0] if words else []
     
 def batch_split_to_words(ps, tasks=['tok/fine', 'pos/ctb']):
+    """[(word, tag), ...] for every text, only texts not in segment_cache go through the tagger."""
+    if not tagger.ready:
+        tagger.warmup()
+        return [split_to_words_jieba(p) for p in ps] # not cached, HanLP replaces these once loaded
+    words = [segment_cache.get(p, tasks) for p in ps]
+    misses = [i for i, w in enumerate(words) if w is None]
+    if not misses: return words
+    todo = list(dict.fromkeys(ps[i] for i in misses)) # a text repeated in the batch is tagged once
     try:
-        results = tagger(ps, tasks=tasks)
-        return [list(zip(tokens, tags)) for tokens, tags in zip(results['tok/fine'], results['pos/ctb'])]
+        start = time.perf_counter()
+        if tagger_service:
+            tagged = dict(zip(todo, tagger_service.submit(todo, tasks).result()))
+        else:
+            results = tagger(todo, tasks=tasks)
+            tagged = {p: list(zip(tokens, tags)) for p, tokens, tags in zip(todo, results['tok/fine'], results['pos/ctb'])}
+        seconds = (time.perf_counter() - start) / len(todo)
     except Exception as e:
         print(f"An error occurred during text segmentation: {e}")
         return []
+    for p, w in tagged.items():
+        segment_cache.put(p, tasks, w, seconds)
+    for i in misses:
+        words[i] = tagged[ps[i]]
+    return words
 
 
 # --- Line grouping: Combining lines that are likely to be part of the same thought/sentence
 
 # 1. Heuristic: punctuation-based continuation score
+MID_CLAUSE = "，、：；（《“‘" # These punctuation marks strongly indicate continuation
+END_CLAUSE = "。！？" # These indicate sentence boundary
+
 def punctuation_score(line):
     if not line: return 0
     last = line[-1]
 
-    # These punctuation marks strongly indicate continuation
-    mid_clause = "，、：；（《“‘"
-    if last in mid_clause:
+    if last in MID_CLAUSE:
         return 1.0
 
-    # These indicate sentence boundary
-    end_clause = "。！？"
-    if last in end_clause:
+    if last in END_CLAUSE:
         return -0.5
 
     return 0.0
@@ -65,33 +283,113 @@ def punctuation_score(line):
 #        L1: "这是一个问"
 #        L2: "题，我们必须"
 #    "问题" is split → strong continuation
+# Only the word jieba.cut(window) puts across the line break matters. The run of characters around
+# the break that jieba segments together is routed with a lookup index of jieba's dictionary, the
+# same most probable path jieba takes. jieba itself only runs when single characters meet at the
+# break, where its HMM may join them into a new word.
+# Gives exactly jieba's result (checked by tests/nlp/word_split_bench.py).
+JIEBA_BLOCK_CHARS = "[\u4E00-\u9FD5a-zA-Z0-9+#&\\._%\\-]" # what jieba.cut segments, anything else is cut per char
+_block_end = re.compile(JIEBA_BLOCK_CHARS + r"+\Z")
+_block_start = re.compile(JIEBA_BLOCK_CHARS + "+")
+_boundary_index = None
+_boundary_lock = threading.Lock()
+
+def load_boundary_index():
+    """
+    (words, prefixes, unknown) for word_split_score, built once from jieba's dictionary file (about a second):
+    words maps each word to its log probability, unknown is the one of a char jieba doesn't know.
+    """
+    global _boundary_index
+    with _boundary_lock:
+        if _boundary_index is None:
+            counts, total = {}, 0
+            with jieba.get_dict_file() as f:
+                for line in f:
+                    word, count = line.decode("utf-8").strip().split(" ")[:2]
+                    counts[word] = int(count)
+                    total += int(count)
+            logtotal = log(total)
+            words = {w: log(c) - logtotal for w, c in counts.items() if c}
+            prefixes = frozenset(w[:k] for w in words for k in range(1, len(w)))
+            _boundary_index = (words, prefixes, log(1) - logtotal)
+        return _boundary_index
+
+def jieba_straddling_word(tail, head):
+    """The word of jieba.cut(tail + head) that crosses from tail into head, or None."""
+    pos = 0
+    for w in jieba.cut(tail + head):
+        if pos < len(tail) < pos + len(w): return w
+        pos += len(w)
+    return None
+
+@lru_cache(maxsize=4096)
+def straddling_word(tail, head):
+    """jieba_straddling_word, without running jieba unless its HMM decides."""
+    left, right = _block_end.search(tail), _block_start.match(head)
+    if not left or not right:
+        # outside blocks jieba yields single characters, or a \r\n pair
+        return "\r\n" if tail.endswith("\r") and head.startswith("\n") else None
+    block = left.group() + right.group()
+    b = len(left.group()) # position of the break in the block
+    words, prefixes, unknown = _boundary_index or load_boundary_index()
+
+    # most probable route from the end, ties go to the longer word (like jieba)
+    n = len(block)
+    route = [None] * n + [(0.0, 0)]
+    for i in range(n - 1, -1, -1):
+        best = None
+        for j in range(i + 1, n + 1):
+            w = block[i:j]
+            p = words.get(w)
+            if p is None:
+                if w not in prefixes: break
+                continue
+            step = (p + route[j][0], j - 1)
+            if best is None or step > best: best = step
+        route[i] = best or (unknown + route[i + 1][0], i)
+
+    # walk it: dictionary words, and runs of single chars in between
+    x = run = 0 # run: where the current run of single chars started
+    while x < b:
+        y = route[x][1] + 1
+        if y - x > 1:
+            if y > b: return block[x:y]
+            run = y
+        x = y
+    if run == b: return None # a word ends at the break
+    while x < n and route[x][1] == x: x += 1
+    if x == b: return None # a word starts at the break
+
+    # single chars meet at the break: jieba's HMM joins them unless they are a dictionary word together
+    if block[run:x] in words: return None
+    return jieba_straddling_word(tail, head)
+
 def word_split_score(line1, line2):
     if not line1 or not line2: return 0
 
     # take last 3 chars of L1 and first 3 of L2
-    window = line1[-3:] + line2[:3]
-    words = list(split_to_words_fast(window))
+    w = straddling_word(line1[-3:], line2[:3])
 
     # if a long word spans the boundary, we count that
-    score = 0.0
-    for w in words:
-        # word appears across line boundary
-        if len(w) >= 2 and w in window and w not in line1 and w not in line2:
-            score += 1.0
-
-    return min(score, 1.0)
+    if w and w not in line1 and w not in line2:
+        return 1.0
+    return 0.0
 
 
 # 3. Tiny semantic similarity using Simhash
+@lru_cache(maxsize=4096)
+def line_simhash(line):
+    return Simhash(line).value
+
 def semantic_similarity(line1, line2):
     if not line1 or not line2: return 0.0
 
-    h1 = Simhash(line1).value
-    h2 = Simhash(line2).value
+    h1 = line_simhash(line1)
+    h2 = line_simhash(line2)
 
     # Hamming distance normalized
     max_bits = 64
-    dist = bin(h1 ^ h2).count("1")
+    dist = (h1 ^ h2).bit_count()
     return 1 - dist / max_bits  # range 0–1
 
 
@@ -101,8 +399,10 @@ PARA_START_CUES = [
     "总结来说", "综上所述", "总之", "对于", "关于"
 ]
 
+PARA_START_RE = re.compile("|".join(map(re.escape, sorted(PARA_START_CUES, key=len, reverse=True))))
+
 def paragraph_start_signal(line):
-    return 1.0 if any(line.startswith(c) for c in PARA_START_CUES) else 0.0
+    return 1.0 if PARA_START_RE.match(line) else 0.0
 
 
 def continuation_score(L1, L2):
@@ -113,6 +413,41 @@ def continuation_score(L1, L2):
         1.0 * paragraph_start_signal(L2)
     )
 
+_MID_CODES = np.array([ord(c) for c in MID_CLAUSE], dtype=np.uint32)
+_END_CODES = np.array([ord(c) for c in END_CLAUSE], dtype=np.uint32)
+_CUE_CODES = [np.array([ord(c) for c in cue], dtype=np.uint32) for cue in PARA_START_CUES]
+_CUE_CHARS = max(map(len, PARA_START_CUES))
+
+# continuation_score of every adjacent pair at once. Punctuation and paragraph cues are read from one
+# array of the code points of all lines, simhash distances are array ops on the per-line hashes.
+# Only the word split check still runs per pair (jieba).
+def continuation_scores(lines):
+    if len(lines) < 2: return np.zeros(0)
+    lens = np.fromiter(map(len, lines), dtype=np.int64, count=len(lines))
+    chars = np.frombuffer(("".join(lines) + "\0").encode("utf-32-le"), dtype=np.uint32) # \0: never out of range
+    ends = np.cumsum(lens)
+    starts = ends - lens
+    nonempty = lens > 0
+
+    # last char of every line (0 for empty lines)
+    last = np.where(nonempty, chars[np.maximum(ends - 1, 0)], 0)[:-1]
+    punct = np.isin(last, _MID_CODES) * 1.0 - np.isin(last, _END_CODES) * 0.5
+
+    # first chars of every line, 0 past the line's end
+    offsets = np.arange(_CUE_CHARS)
+    heads = chars[np.minimum(starts[1:, None] + offsets, len(chars) - 1)]
+    heads[offsets >= lens[1:, None]] = 0
+    cue = np.zeros(len(lines) - 1)
+    for codes in _CUE_CODES:
+        cue[(heads[:, :len(codes)] == codes).all(axis=1)] = 1.0
+
+    hashes = np.array([line_simhash(l) if l else 0 for l in lines], dtype=np.uint64)
+    dist = np.unpackbits((hashes[:-1] ^ hashes[1:]).view(np.uint8)).reshape(-1, 64).sum(axis=1)
+    sim = np.where(nonempty[:-1] & nonempty[1:], 1 - dist / 64, 0.0)
+
+    split = np.array([word_split_score(l1, l2) for l1, l2 in zip(lines, lines[1:])])
+    return 0.5 * punct + 0.7 * split + 0.4 * sim - 1.0 * cue
+
 def bounding_box(box1, box2):
     return [min(box1[0], box2[0]), min(box1[1], box2[1]), max(box1[2], box2[2]), max(box1[3], box2[3])]
 
@@ -123,24 +458,20 @@ def group_lines(data, threshold=0.2):
 
     groups = [] # list of strings
     group_boxes = [] # list of coordinates
-    current = lines[0]
+    current = [lines[0]]
     current_box = boxes[0]
 
-    for i in range(len(lines) - 1):
-        L1, L2 = lines[i], lines[i+1]
-        B1, B2 = boxes[i], boxes[i+1]
-        score = continuation_score(L1, L2)
+    for i, score in enumerate(continuation_scores(lines).tolist()):
         #print(f"Score({i}->{i+1}) = {score:.3f}")
-
         if score >= threshold:
-            current += L2
-            current_box = bounding_box(B1, B2)
+            current.append(lines[i+1])
+            current_box = bounding_box(boxes[i], boxes[i+1])
         else:
-            groups.append(current)
+            groups.append("".join(current))
             group_boxes.append(current_box)
-            current = L2
-            current_box = B2
+            current = [lines[i+1]]
+            current_box = boxes[i+1]
 
-    groups.append(current)
+    groups.append("".join(current))
     group_boxes.append(current_box)
     return {'texts': groups, 'boxes': group_boxes}
\ No newline at end of file
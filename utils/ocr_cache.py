@@ -0,0 +1,134 @@
+"""
+Cache of recognized text lines keyed by a hash of the normalized line crop, shared by every client.
+UI labels and recurring subtitle lines come back all the time, a hit skips recognition of the crop
+and, once the line has been segmented, HanLP tagging too.
+
+Crops are normalized before hashing (gray, KEY_HEIGHT px tall, 16 gray levels) so the same line
+at the same size hashes the same despite a little compression noise. Entries live in a bounded LRU,
+optionally backed by SQLite so they survive restarts.
+"""
+
+import sys
+import json
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+from utils.ocr_engine import polys_to_boxes
+
+KEY_HEIGHT = 24
+
+
+def line_key(crop):
+    import cv2
+    gray = crop[..., 1] if crop.ndim == 3 else crop # green is close enough to luma
+    height, width = gray.shape
+    size = (max(int(round(KEY_HEIGHT * width / max(height, 1))), 1), KEY_HEIGHT)
+    small = cv2.resize(np.ascontiguousarray(gray), size, interpolation=cv2.INTER_AREA) >> 4
+    return hashlib.blake2b(small.tobytes(), digest_size=16, person=str(size).encode()[:16]).hexdigest()
+
+
+class LineCache:
+    def __init__(self, max_entries=4096, db_path=None):
+        self.max_entries = max_entries
+        self.entries = OrderedDict() # key -> {'text', 'score', 'words'}
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock() # the OCR thread looks lines up, NLP threads store segmentation
+        self.db = None
+        if db_path:
+            self.db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("PRAGMA synchronous=NORMAL")
+            self.db.execute("CREATE TABLE IF NOT EXISTS ocr_lines "
+                            "(key TEXT PRIMARY KEY, text TEXT, score REAL, words TEXT)")
+
+    def _remember(self, key, entry):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return entry
+
+    def get(self, key):
+        with self._lock:
+            return self._get(key)
+
+    def _get(self, key):
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+        if self.db:
+            row = self.db.execute("SELECT text, score, words FROM ocr_lines WHERE key = ?", (key,)).fetchone()
+            if row:
+                self.disk_hits += 1
+                text, score, words = row
+                return self._remember(key, {'text': text, 'score': score, 'words': json.loads(words) if words else None})
+        self.misses += 1
+        return None
+
+    def put(self, key, text, score):
+        with self._lock:
+            if self.db:
+                self.db.execute("INSERT OR REPLACE INTO ocr_lines VALUES (?, ?, ?, NULL)", (key, text, score))
+            return self._remember(key, {'text': text, 'score': score, 'words': None})
+
+    def set_words(self, key, words):
+        """Segmentation of the line, [(word, tag), ...]."""
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None: entry['words'] = words
+            if self.db:
+                self.db.execute("UPDATE ocr_lines SET words = ? WHERE key = ?", (json.dumps(words, ensure_ascii=False), key))
+
+    def memory_bytes(self):
+        with self._lock:
+            entries = list(self.entries.items())
+        size = sys.getsizeof(self.entries)
+        for key, entry in entries:
+            size += sys.getsizeof(key) + sys.getsizeof(entry) + sys.getsizeof(entry['text'])
+            for word in entry['words'] or ():
+                size += sys.getsizeof(word) + sum(sys.getsizeof(s) for s in word)
+        return size
+
+    def stats(self):
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            'entries': len(self.entries),
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            'memory_kb': round(self.memory_bytes() / 1024, 1),
+        }
+
+    def close(self):
+        if self.db: self.db.close()
+
+
+def predict_cached(det, rec, frame, cache):
+    """
+    Detection on the whole frame, recognition only for the line crops the cache doesn't know.
+    Result layout of PaddleOCR.predict plus 'line_keys', the cache key of every line.
+    """
+    height, width = frame.shape[:2]
+    boxes = polys_to_boxes(det.predict(frame)[0]['dt_polys'], width, height)
+    crops = [np.ascontiguousarray(frame[y0:y1, x0:x1]) for x0, y0, x1, y1 in boxes]
+    keys = [line_key(crop) for crop in crops]
+    entries = [cache.get(key) for key in keys]
+
+    misses = [i for i, entry in enumerate(entries) if entry is None]
+    if misses:
+        for i, r in zip(misses, rec.predict([crops[i] for i in misses])):
+            entries[i] = cache.put(keys[i], r['rec_text'], float(r['rec_score']))
+
+    return [{
+        'rec_texts': [entry['text'] for entry in entries],
+        'rec_scores': [entry['score'] for entry in entries],
+        'rec_boxes': np.array(boxes, dtype=np.int32).reshape((-1, 4)),
+        'line_keys': keys,
+    }]
@@ -0,0 +1,279 @@
+"""
+OCR engines used by ocr_server.py, picked by profile name per server instance:
+    gpu    PaddleOCR on the GPU
+    cpu    PaddleOCR on the CPU: MKL-DNN, a fixed thread count, all line crops recognized in batches
+    onnx   exported PP-OCR detection/recognition models run with onnxruntime on the CPU
+           (optional dependency: pip install -r requirements-onnx.txt)
+
+Every engine exposes the same interface:
+    predict(frame)   RGB frame -> [{'rec_texts', 'rec_scores', 'rec_boxes'}] like PaddleOCR.predict
+    det_rec()        (detector, recognizer) pair for incremental OCR (utils/incremental_ocr.py),
+                     with the predict() results of PaddleOCR's TextDetection / TextRecognition
+
+With text_height set, frames are downscaled before OCR so the text lines of the previous frame
+come out about text_height px tall, big subtitles don't need full resolution detection.
+Heavy imports (paddleocr, onnxruntime, cv2) only happen on first use.
+"""
+
+import os
+import numpy as np
+
+DET_MODEL = "PP-OCRv4_mobile_det" # the models PaddleOCR uses for ocr_version="PP-OCRv4"
+REC_MODEL = "PP-OCRv4_mobile_rec"
+ONNX_DET_MODEL = "pretrained_models/PP-OCRv4_mobile_det_onnx/inference.onnx"
+ONNX_REC_MODEL = "pretrained_models/PP-OCRv4_mobile_rec_onnx/inference.onnx"
+
+ENGINES = {} # profile name -> engine class
+
+
+def register_engine(name):
+    def decorator(cls):
+        cls.name = name
+        ENGINES[name] = cls
+        return cls
+    return decorator
+
+
+def create_engine(profile, **config):
+    if profile not in ENGINES:
+        raise ValueError(f"Unknown OCR profile '{profile}', choose from {sorted(ENGINES)}")
+    return ENGINES[profile](**config)
+
+
+def polys_to_boxes(polys, width, height):
+    """Axis aligned [x0, y0, x1, y1] boxes of detected polygons, sorted top to bottom then left to right."""
+    boxes = []
+    for poly in polys:
+        poly = np.asarray(poly)
+        x0, y0 = np.maximum(poly.min(axis=0).astype(int), 0)
+        x1, y1 = poly.max(axis=0).astype(int)
+        x1, y1 = min(x1, width), min(y1, height)
+        if x1 > x0 and y1 > y0:
+            boxes.append([int(x0), int(y0), int(x1), int(y1)])
+    boxes.sort(key=lambda b: (b[1], b[0]))
+    return boxes
+
+
+def resize(frame, scale):
+    import cv2
+    height, width = frame.shape[:2]
+    size = (max(int(width * scale), 1), max(int(height * scale), 1))
+    return cv2.resize(frame, size, interpolation=cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR)
+
+
+class OcrEngine:
+    name = None
+
+    def __init__(self, threads=None, text_height=None, rec_batch_size=16, **config):
+        self.threads = threads
+        self.text_height = text_height
+        self.rec_batch_size = rec_batch_size
+        self.config = config
+        self.line_height = None # median text line height of the last frame, in frame pixels
+        self._model = None
+
+    @property
+    def model(self):
+        if self._model is None:
+            self._model = self.load()
+        return self._model
+
+    def load(self):
+        raise NotImplementedError
+
+    def _predict(self, frame):
+        raise NotImplementedError
+
+    def det_rec(self):
+        raise NotImplementedError
+
+    def predict(self, frame):
+        scale = 1.0
+        if self.text_height and self.line_height:
+            scale = min(1.0, self.text_height / self.line_height)
+        res = self._predict(resize(frame, scale) if scale < 0.9 else frame)[0]
+
+        boxes = np.asarray(res['rec_boxes'], dtype=np.float32).reshape((-1, 4))
+        if scale < 0.9: boxes /= scale
+        boxes = boxes.astype(np.int32)
+        # no text found at this scale, look at full resolution next frame
+        self.line_height = float(np.median(boxes[:, 3] - boxes[:, 1])) if len(boxes) else None
+        return [{'rec_texts': list(res['rec_texts']), 'rec_scores': list(res['rec_scores']), 'rec_boxes': boxes}]
+
+
+@register_engine("gpu")
+class PaddleEngine(OcrEngine):
+    device = "gpu"
+
+    def _options(self):
+        options = {'device': self.device}
+        if self.device == "cpu":
+            options['enable_mkldnn'] = True
+            if self.threads: options['cpu_threads'] = self.threads
+        return options
+
+    def load(self):
+        from paddleocr import PaddleOCR
+        return PaddleOCR(
+            use_doc_orientation_classify=False,
+            use_doc_unwarping=False,
+            use_textline_orientation=False,
+            #lang="en",
+            ocr_version="PP-OCRv4",
+            text_recognition_batch_size=self.rec_batch_size,
+            **self._options(),
+        )
+
+    def _predict(self, frame):
+        return self.model.predict(frame)
+
+    def det_rec(self):
+        from paddleocr import TextDetection, TextRecognition
+        return (TextDetection(model_name=DET_MODEL, **self._options()),
+                TextRecognition(model_name=REC_MODEL, **self._options()))
+
+
+@register_engine("cpu")
+class PaddleCpuEngine(PaddleEngine):
+    device = "cpu"
+
+
+class OnnxDetector:
+    """DB text detection: probability map -> thresholded contours -> expanded rotated boxes."""
+    MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+    STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+
+    def __init__(self, session, limit_side_len=960, thresh=0.3, box_thresh=0.6, unclip_ratio=1.5):
+        self.session = session
+        self.limit_side_len = limit_side_len
+        self.thresh = thresh
+        self.box_thresh = box_thresh
+        self.unclip_ratio = unclip_ratio
+
+    def predict(self, frame):
+        import cv2
+        height, width = frame.shape[:2]
+        scale = min(1.0, self.limit_side_len / max(height, width))
+        # the network downsamples by 32
+        h32 = max(int(round(height * scale / 32)) * 32, 32)
+        w32 = max(int(round(width * scale / 32)) * 32, 32)
+        img = cv2.resize(frame, (w32, h32)).astype(np.float32) / 255
+        img = ((img - self.MEAN) / self.STD).transpose(2, 0, 1)[None]
+        prob = self.session.run(None, {self.session.get_inputs()[0].name: img})[0][0, 0]
+
+        contours, _ = cv2.findContours((prob > self.thresh).astype(np.uint8), cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE)
+        polys, scores = [], []
+        for contour in contours:
+            (cx, cy), (w, h), angle = cv2.minAreaRect(contour)
+            if min(w, h) < 3: continue
+            x, y, bw, bh = cv2.boundingRect(contour)
+            mask = np.zeros((bh, bw), dtype=np.uint8)
+            cv2.fillPoly(mask, [contour - (x, y)], 1)
+            score = float(cv2.mean(prob[y:y + bh, x:x + bw], mask)[0])
+            if score < self.box_thresh: continue
+            # expand the shrunk text kernel back to the full line
+            distance = w * h * self.unclip_ratio / (2 * (w + h))
+            poly = cv2.boxPoints(((cx, cy), (w + 2 * distance, h + 2 * distance), angle))
+            poly[:, 0] = np.clip(poly[:, 0] * width / w32, 0, width)
+            poly[:, 1] = np.clip(poly[:, 1] * height / h32, 0, height)
+            polys.append(poly.astype(np.int32))
+            scores.append(score)
+        return [{'dt_polys': polys, 'dt_scores': scores}]
+
+
+class OnnxRecognizer:
+    """CRNN/SVTR line recognition with greedy CTC decoding, crops are recognized in batches."""
+    HEIGHT = 48
+
+    def __init__(self, session, chars, batch_size=16, max_width=3200):
+        self.session = session
+        self.chars = ['blank'] + chars + [' ']
+        self.batch_size = batch_size
+        self.max_width = max_width
+
+    def _batch(self, crops):
+        import cv2
+        ratio = max(c.shape[1] / max(c.shape[0], 1) for c in crops)
+        width = min(max(int(np.ceil(self.HEIGHT * ratio)), 320), self.max_width)
+        batch = np.zeros((len(crops), 3, self.HEIGHT, width), dtype=np.float32)
+        for i, crop in enumerate(crops):
+            w = min(max(int(np.ceil(self.HEIGHT * crop.shape[1] / max(crop.shape[0], 1))), 1), width)
+            img = cv2.resize(crop, (w, self.HEIGHT)).astype(np.float32)
+            batch[i, :, :, :w] = (img / 255 - 0.5).transpose(2, 0, 1) / 0.5
+        return batch
+
+    def _decode(self, probs):
+        idx = probs.argmax(axis=1)
+        keep = (idx != 0) & np.append(True, idx[1:] != idx[:-1])
+        text = "".join(self.chars[i] for i in idx[keep] if i < len(self.chars))
+        score = float(probs.max(axis=1)[keep].mean()) if keep.any() else 0.0
+        return {'rec_text': text, 'rec_score': score}
+
+    def _ratio(self, crop):
+        return crop.shape[1] / max(crop.shape[0], 1)
+
+    def predict(self, crops):
+        # similar widths go together so little of each batch is padding: a batch ends when it is
+        # full or the next crop would need more than 1.5x the padded width of its first crop
+        order = sorted(range(len(crops)), key=lambda i: self._ratio(crops[i]))
+        batches = []
+        for i in order:
+            if (not batches or len(batches[-1]) == self.batch_size
+                    or self._ratio(crops[i]) > 1.5 * max(self._ratio(crops[batches[-1][0]]), 320 / self.HEIGHT)):
+                batches.append([])
+            batches[-1].append(i)
+
+        results = [None] * len(crops)
+        name = self.session.get_inputs()[0].name
+        for ids in batches:
+            probs = self.session.run(None, {name: self._batch([crops[i] for i in ids])})[0]
+            for i, p in zip(ids, probs):
+                results[i] = self._decode(p)
+        return results
+
+
+def load_chars(rec_model, rec_dict=None):
+    """Recognition charset: a dict file (one char per line), the ONNX metadata, or the exported inference.yml."""
+    if rec_dict:
+        with open(rec_dict, encoding="utf-8") as f:
+            return [line.rstrip("\r\n") for line in f]
+    import onnxruntime as ort
+    meta = ort.InferenceSession(rec_model, providers=["CPUExecutionProvider"]).get_modelmeta().custom_metadata_map
+    if 'character' in meta:
+        return meta['character'].splitlines()
+    import yaml
+    with open(os.path.join(os.path.dirname(rec_model), "inference.yml"), encoding="utf-8") as f:
+        return yaml.safe_load(f)['PostProcess']['character_dict']
+
+
+@register_engine("onnx")
+class OnnxEngine(OcrEngine):
+    def load(self):
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ImportError("the onnx profile needs onnxruntime: pip install -r requirements-onnx.txt") from e
+        options = ort.SessionOptions()
+        if self.threads:
+            options.intra_op_num_threads = self.threads
+            options.inter_op_num_threads = 1
+        det_model = self.config.get('det_model', ONNX_DET_MODEL)
+        rec_model = self.config.get('rec_model', ONNX_REC_MODEL)
+        det = ort.InferenceSession(det_model, options, providers=["CPUExecutionProvider"])
+        rec = ort.InferenceSession(rec_model, options, providers=["CPUExecutionProvider"])
+        return (OnnxDetector(det, self.config.get('det_limit_side_len', 960)),
+                OnnxRecognizer(rec, load_chars(rec_model, self.config.get('rec_dict')), self.rec_batch_size))
+
+    def det_rec(self):
+        return self.model
+
+    def _predict(self, frame):
+        det, rec = self.model
+        height, width = frame.shape[:2]
+        boxes = polys_to_boxes(det.predict(frame)[0]['dt_polys'], width, height)
+        results = rec.predict([np.ascontiguousarray(frame[y0:y1, x0:x1]) for x0, y0, x1, y1 in boxes]) if boxes else []
+        return [{
+            'rec_texts': [r['rec_text'] for r in results],
+            'rec_scores': [r['rec_score'] for r in results],
+            'rec_boxes': boxes,
+        }]
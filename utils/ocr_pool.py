@@ -0,0 +1,175 @@
+"""
+Pool of OCR worker processes, each with its own preloaded engine (utils/ocr_engine.py), so OCR
+can use more than one core. Frames go to the workers through a shared memory FrameRing, only
+the slot index and frame shape are pickled. Any idle worker takes the next job, results come back
+through a queue and resolve the asyncio future returned by predict().
+
+Callers keep their own order: await the futures in the order the frames were submitted
+(ocr_server.py does this per client), workers finishing out of order doesn't matter then.
+"""
+
+import os
+import time
+import queue
+import asyncio
+import threading
+import multiprocessing as mp
+from itertools import count
+import numpy as np
+from utils.frame_ring import FrameRing
+from utils.ocr_engine import create_engine
+
+WARMUP_IMAGE = "assets/images/screenshot_1.jpeg"
+STARTUP_TIMEOUT = 300 # seconds for a worker to import, load and warm up its engine
+
+
+def _warmup_frame():
+    try:
+        import cv2
+        frame = cv2.imread(WARMUP_IMAGE)
+        if frame is not None: return np.ascontiguousarray(frame[..., ::-1])
+    except ImportError:
+        pass
+    return np.full((96, 640, 3), 255, dtype=np.uint8)
+
+
+def _worker(profile, config, ring_name, slots, slot_size, jobs, results):
+    try:
+        engine = create_engine(profile, **config)
+        engine.predict(_warmup_frame()) # loads the model and runs the first (slow) inference
+        ring = FrameRing.attach(ring_name, slots, slot_size)
+    except Exception as e:
+        results.put(('error', os.getpid(), repr(e)))
+        return
+    results.put(('ready', os.getpid(), None))
+
+    while (job := jobs.get()) is not None:
+        job_id, slot, shape, frame = job
+        view = None
+        try:
+            if frame is None:
+                view = ring.slot_view(slot, int(np.prod(shape)))
+                frame = np.frombuffer(view, dtype=np.uint8).reshape(shape)
+            res = engine.predict(frame)[0]
+            results.put((job_id, {
+                'rec_texts': list(res['rec_texts']),
+                'rec_scores': [float(s) for s in res['rec_scores']],
+                'rec_boxes': np.asarray(res['rec_boxes']),
+            }, None))
+        except Exception as e:
+            results.put((job_id, None, repr(e)))
+        finally:
+            if view is not None:
+                frame = res = None # arrays on the slot have to go before the view can be released
+                view.release()
+    ring.close()
+
+
+class OcrWorkerPool:
+    def __init__(self, workers=2, profile="cpu", slot_size=1920 * 1080 * 3, **engine_config):
+        self.workers = workers
+        self.profile = profile
+        self.slot_size = slot_size
+        self.engine_config = engine_config
+        self.slots = workers * 2 # one frame in OCR and one waiting per worker
+        self._ids = count()
+        self._futures = {} # job id -> (future, slot)
+        self._ring = None
+        self._free = None
+        self._loop = None
+        self._processes = []
+
+    def start(self, timeout=STARTUP_TIMEOUT):
+        """
+        Start the workers and block until every one of them is loaded and warmed up.
+        Raises RuntimeError (with the workers stopped) if one fails, dies or doesn't get ready in time.
+        """
+        ctx = mp.get_context("spawn") # CUDA / HanLP state in this process must not be forked
+        self._ring = FrameRing.create(slots=self.slots, slot_size=self.slot_size)
+        self._jobs = ctx.Queue()
+        self._results = ctx.Queue()
+        for _ in range(self.workers):
+            p = ctx.Process(target=_worker, daemon=True,
+                            args=(self.profile, self.engine_config, self._ring.name, self.slots,
+                                  self.slot_size, self._jobs, self._results))
+            p.start()
+            self._processes.append(p)
+        deadline = time.monotonic() + timeout
+        ready = 0
+        while ready < self.workers:
+            try:
+                status, pid, error = self._results.get(timeout=1)
+            except queue.Empty:
+                dead = [p for p in self._processes if p.exitcode is not None]
+                if dead: self._abort(f"OCR worker {dead[0].pid} exited with code {dead[0].exitcode} while starting")
+                if time.monotonic() > deadline: self._abort(f"OCR workers not ready after {timeout} s")
+                continue
+            if status == 'error': self._abort(f"OCR worker {pid} failed to start: {error}")
+            ready += 1
+            print(f"OCR worker {pid} ready ({ready}/{self.workers})")
+        self._reader = threading.Thread(target=self._read_results, daemon=True)
+        self._reader.start()
+
+    def _abort(self, message):
+        for p in self._processes: p.terminate()
+        for p in self._processes: p.join(timeout=5)
+        self._processes = []
+        self._ring.close()
+        raise RuntimeError(message)
+
+    def _read_results(self):
+        while (result := self._results.get()) is not None:
+            job_id, res, error = result
+            future, slot = self._futures.pop(job_id)
+            self._loop.call_soon_threadsafe(self._resolve, future, slot, res, error)
+
+    def _resolve(self, future, slot, res, error):
+        if slot is not None:
+            self._ring.release(slot)
+            self._free.put_nowait(slot)
+        if future.cancelled(): return
+        if error: future.set_exception(RuntimeError(f"OCR worker failed: {error}"))
+        else: future.set_result([res])
+
+    async def acquire_slot(self):
+        if self._free is None:
+            self._loop = asyncio.get_running_loop()
+            self._free = asyncio.Queue()
+            for slot in range(self.slots): self._free.put_nowait(slot)
+        return await self._free.get()
+
+    def release_slot(self, slot):
+        self._free.put_nowait(slot)
+
+    def write(self, slot, frame):
+        """Copy a frame into a slot (from any thread), False if it doesn't fit and has to be pickled."""
+        if frame.nbytes > self.slot_size: return False
+        self._ring.write(slot, np.ascontiguousarray(frame))
+        return True
+
+    def submit(self, slot, frame, in_slot=True):
+        """
+        Queue OCR of the frame written to `slot` (or of `frame` itself), returns a future of the result.
+        A frame that isn't in a slot is pickled later by the queue's feeder thread, it must not change until then.
+        """
+        future = self._loop.create_future()
+        job_id = next(self._ids)
+        if in_slot:
+            self._futures[job_id] = (future, slot)
+            self._jobs.put((job_id, slot, frame.shape, None))
+        else:
+            self.release_slot(slot)
+            self._futures[job_id] = (future, None)
+            self._jobs.put((job_id, None, frame.shape, frame))
+        return future
+
+    async def predict(self, frame):
+        """OCR one frame on a worker: [{'rec_texts', 'rec_scores', 'rec_boxes'}]."""
+        slot = await self.acquire_slot()
+        return await self.submit(slot, frame, self.write(slot, frame))
+
+    def close(self):
+        for _ in self._processes: self._jobs.put(None)
+        for p in self._processes: p.join(timeout=5)
+        self._results.put(None)
+        self._ring.close()
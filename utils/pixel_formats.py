@@ -0,0 +1,91 @@
+"""
+Server-side decoding of captured VideoFrame payloads: crop first, then convert only the cropped
+pixels to RGB with vectorized NumPy. YUV frames can also hand their Y (luma) plane straight to OCR.
+
+Layouts match VideoFrame.copyTo with the default (tightly packed) layout:
+    I420: Y plane (w*h), U plane (cw*ch), V plane (cw*ch)      cw, ch = ceil(w/2), ceil(h/2)
+    NV12: Y plane (w*h), interleaved UV plane (cw*ch*2)
+    RGB / RGBA / BGRA: packed pixels (RGBX/BGRX are sent as RGBA/BGRA)
+"""
+
+import numpy as np
+
+RGB = 0
+RGBA = 1
+BGRA = 2
+I420 = 3
+NV12 = 4
+
+FORMAT_NAMES = {RGB: "RGB", RGBA: "RGBA", BGRA: "BGRA", I420: "I420", NV12: "NV12"}
+
+
+def frame_size(fmt, width, height):
+    cw, ch = (width + 1) // 2, (height + 1) // 2
+    if fmt == RGB: return width * height * 3
+    if fmt in (RGBA, BGRA): return width * height * 4
+    if fmt in (I420, NV12): return width * height + cw * ch * 2
+    raise ValueError(f"Unknown pixel format {fmt}")
+
+
+def yuv_to_rgb(y, u, v):
+    """BT.601 full range YUV -> RGB (the coefficients the renderer used to convert with). u, v are subsampled 2x2."""
+    h, w = y.shape
+    u = u.astype(np.float32) - 128
+    v = v.astype(np.float32) - 128
+    y = y.astype(np.float32)
+
+    rgb = np.empty((h, w, 3), dtype=np.uint8)
+    # chroma terms are computed at the subsampled resolution, then upsampled 2x2 and added to Y
+    for c, offset in enumerate((1.402 * v,                   # R = Y + 1.402 V
+                                -0.344136 * u - 0.714136 * v, # G = Y - 0.344136 U - 0.714136 V
+                                1.772 * u)):                 # B = Y + 1.772 U
+        offset = offset.repeat(2, axis=0).repeat(2, axis=1)[:h, :w]
+        offset += y
+        rgb[..., c] = np.clip(offset, 0, 255, out=offset)
+    return rgb
+
+
+def crop_rect(width, height, crop, align=1):
+    """Clamp a (x, y, w, h) crop to the frame, x/y are aligned down to `align`. (0, 0, 0, 0) means no crop."""
+    x, y, w, h = crop if crop else (0, 0, 0, 0)
+    if w == 0 or h == 0:
+        return 0, 0, width, height
+    x, y = min(x, width - 1) // align * align, min(y, height - 1) // align * align
+    return x, y, min(w, width - x), min(h, height - y)
+
+
+def decode_frame(buf, fmt, width, height, crop=None, grayscale=False):
+    """
+    Turn a frame payload (bytes-like, a view is fine) into an (h, w, 3) uint8 RGB array of the crop.
+    With grayscale=True, YUV frames skip color conversion and return the luma plane as 3 channels.
+    """
+    data = np.frombuffer(buf, dtype=np.uint8, count=frame_size(fmt, width, height))
+
+    if fmt in (RGB, RGBA, BGRA):
+        channels = 3 if fmt == RGB else 4
+        x, y, w, h = crop_rect(width, height, crop)
+        pixels = data.reshape((height, width, channels))[y:y + h, x:x + w]
+        if fmt == RGB: return pixels
+        if fmt == RGBA: return pixels[..., :3]
+        return pixels[..., 2::-1] # BGRA -> RGB
+
+    # chroma is subsampled 2x2, keep the crop aligned to it
+    x, y, w, h = crop_rect(width, height, crop, align=2)
+    cw, ch = (width + 1) // 2, (height + 1) // 2
+    luma = data[:width * height].reshape((height, width))[y:y + h, x:x + w]
+    if grayscale:
+        return np.repeat(luma[..., None], 3, axis=2)
+
+    cx, cy, cw_crop, ch_crop = x // 2, y // 2, (w + 1) // 2, (h + 1) // 2
+    chroma = data[width * height:]
+    if fmt == I420:
+        u = chroma[:cw * ch].reshape((ch, cw))
+        v = chroma[cw * ch:].reshape((ch, cw))
+    elif fmt == NV12:
+        uv = chroma.reshape((ch, cw, 2))
+        u, v = uv[..., 0], uv[..., 1]
+    else:
+        raise ValueError(f"Unknown pixel format {fmt}")
+    return yuv_to_rgb(luma,
+                      u[cy:cy + ch_crop, cx:cx + cw_crop],
+                      v[cy:cy + ch_crop, cx:cx + cw_crop])
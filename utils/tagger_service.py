@@ -0,0 +1,127 @@
+"""
+Micro-batching in front of the HanLP tagger: requests from every caller (the OCR thread, ASR,
+the event loop) are collected for up to window_ms or max_batch sentences and tagged in one
+batched forward pass on a single background thread, which is also the only thread calling the model.
+Sentences are sorted by length and split into buckets of similar length so short lines aren't
+padded to the longest one in the batch.
+
+    service = TaggerService(lang.tagger).start()
+    words = service.submit(texts).result()     # from a thread
+    words = await service.split(texts)         # from asyncio
+language_processor.batch_split_to_words goes through the service once lang.use_tagger_service() ran.
+"""
+
+import time
+import queue
+import asyncio
+import threading
+from concurrent.futures import Future
+
+DEFAULT_TASKS = ('tok/fine', 'pos/ctb')
+
+
+def length_buckets(texts, max_batch=64, max_ratio=2.0):
+    """Split texts into batches sorted by length, longest / shortest <= max_ratio inside a batch."""
+    buckets, current = [], []
+    for text in sorted(texts, key=len):
+        if current and (len(current) >= max_batch or len(text) > max_ratio * max(len(current[0]), 1)):
+            buckets.append(current)
+            current = []
+        current.append(text)
+    if current: buckets.append(current)
+    return buckets
+
+
+class _Request:
+    def __init__(self, texts, tasks):
+        self.texts = texts
+        self.tasks = tuple(tasks)
+        self.future = Future()
+
+
+class TaggerService:
+    def __init__(self, tagger, window_ms=5, max_batch=64, max_ratio=2.0):
+        self.tagger = tagger
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.max_ratio = max_ratio
+        self._queue = queue.Queue()
+        self._thread = None
+        self.batches = 0 # forward passes
+        self.sentences = 0
+        self.requests = 0
+        self.chars = 0
+        self.padded_chars = 0
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="tagger", daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def submit(self, texts, tasks=DEFAULT_TASKS):
+        """Queue texts for tagging, returns a concurrent Future of [[(word, tag), ...], ...]."""
+        request = _Request(list(texts), tasks)
+        if not request.texts: request.future.set_result([])
+        else: self._queue.put(request)
+        return request.future
+
+    async def split(self, texts, tasks=DEFAULT_TASKS):
+        return await asyncio.wrap_future(self.submit(texts, tasks))
+
+    def _collect(self, first):
+        """The first request plus whatever arrives within the window, up to max_batch sentences."""
+        requests = [first]
+        size = len(first.texts)
+        deadline = time.perf_counter() + self.window
+        while size < self.max_batch:
+            timeout = deadline - time.perf_counter()
+            try:
+                request = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is None: # close() while collecting, finish this batch first
+                self._queue.put(None)
+                break
+            requests.append(request)
+            size += len(request.texts)
+        return requests
+
+    def _run(self):
+        while (first := self._queue.get()) is not None:
+            requests = self._collect(first)
+            by_tasks = {}
+            for request in requests:
+                by_tasks.setdefault(request.tasks, []).append(request)
+            for tasks, group in by_tasks.items():
+                self._tag(tasks, group)
+
+    def _tag(self, tasks, requests):
+        texts = list(dict.fromkeys(t for request in requests for t in request.texts))
+        words = {}
+        try:
+            for bucket in length_buckets(texts, self.max_batch, self.max_ratio):
+                res = self.tagger(bucket, tasks=list(tasks))
+                for text, tokens, tags in zip(bucket, res['tok/fine'], res['pos/ctb']):
+                    words[text] = list(zip(tokens, tags))
+                self.batches += 1
+                self.chars += sum(map(len, bucket))
+                self.padded_chars += len(bucket[-1]) * len(bucket)
+        except Exception as e:
+            for request in requests: request.future.set_exception(e)
+            return
+        self.requests += len(requests)
+        self.sentences += len(texts)
+        for request in requests:
+            request.future.set_result([words[t] for t in request.texts])
+
+    def stats(self):
+        return {
+            'requests': self.requests,
+            'batches': self.batches,
+            'mean_batch': self.sentences / self.batches if self.batches else 0.0,
+            'padding_waste': 1 - self.chars / self.padded_chars if self.padded_chars else 0.0,
+        }